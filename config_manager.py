@@ -1,17 +1,68 @@
 import json
 import os
+import threading
 from typing import Dict, Optional
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to the stdlib json module
+    orjson = None
+
+
+def _dumps(obj, indent: bool = True) -> bytes:
+    """Serialize obj to JSON bytes, indented or compact"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2) if indent else orjson.dumps(obj)
+    if indent:
+        return json.dumps(obj, indent=2).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(data: bytes):
+    """Parse JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _atomic_write(path: str, data: bytes):
+    """Write data to path via a temp file and rename, so readers never see a partial file"""
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 class ConfigManager:
     """Manages application settings and server configurations"""
     
-    def __init__(self, config_file: str = "servers.json", settings_file: str = "settings.json"):
+    # Delay before pending server/stack changes are written to disk
+    SAVE_DELAY_SECONDS = 0.2
+    
+    def __init__(self, config_file: str = "servers.json", settings_file: str = "settings.json",
+                 stacks_file: str = "stacks.json"):
         self.config_file = config_file
         self.settings_file = settings_file
+        self.stacks_file = stacks_file
         self.settings: Dict = {}
         self.servers: Dict[str, Dict] = {}
         self.stacks: Dict[str, list] = {}
+        
+        # Coalesced saves: mutations mark a file dirty and a single timer writes it
+        self._lock = threading.RLock()
+        self._dirty_servers = False
+        self._dirty_stacks = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._saved_servers: Optional[bytes] = None  # Last servers.json content written
+        
         self.load_settings()
         self.load_config()
         self.load_stacks()
@@ -20,8 +71,8 @@ class ConfigManager:
         """Load application settings from settings.json"""
         if os.path.exists(self.settings_file):
             try:
-                with open(self.settings_file, 'r') as f:
-                    self.settings = json.load(f)
+                with open(self.settings_file, 'rb') as f:
+                    self.settings = _loads(f.read())
             except Exception as e:
                 print(f"Error loading settings: {e}")
                 self.settings = {}
@@ -42,14 +93,14 @@ class ConfigManager:
                 self.settings[key] = default_value
                 settings_changed = True
         
-        if not os.path.exists(self.settings_file) or settings_changed:
+        # A missing file leaves every default unset, so this also covers first run
+        if settings_changed:
             self.save_settings()
 
     def save_settings(self):
         """Save application settings"""
         try:
-            with open(self.settings_file, 'w') as f:
-                json.dump(self.settings, f, indent=2)
+            _atomic_write(self.settings_file, _dumps(self.settings))
         except Exception as e:
             print(f"Error saving settings: {e}")
 
@@ -57,8 +108,8 @@ class ConfigManager:
         """Load server configurations"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r') as f:
-                    self.servers = json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    self.servers = _loads(f.read())
             except Exception as e:
                 print(f"Error loading config: {e}")
                 self.servers = {}
@@ -67,20 +118,64 @@ class ConfigManager:
         
         # Backward compatibility
         default_python_cmd = self.settings.get("python_command", "python")
+        changed = False
         for name, config in self.servers.items():
             if "server_type" not in config:
                 config["server_type"] = "nodejs"
+                changed = True
             if "python_command" not in config:
                 config["python_command"] = default_python_cmd
+                changed = True
+        
+        # Persist the upgraded entries once so later starts skip the fixups
+        if changed:
+            self.mark_dirty("servers")
 
     def save_config(self):
         """Save server configurations"""
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.servers, f, indent=2)
+            # servers.json is rewritten on every status change, so it is kept compact.
+            # The write stays under the lock: the save timer and an explicit flush() can
+            # both get here, and the snapshot must match what ends up on disk
+            with self._lock:
+                data = _dumps(self.servers, indent=False)
+                if data == self._saved_servers:
+                    return  # e.g. a restart flipped the status back within one save delay
+                _atomic_write(self.config_file, data)
+                self._saved_servers = data
         except Exception as e:
             print(f"Error saving config: {e}")
 
+    def mark_dirty(self, kind: str):
+        """
+        Schedule a coalesced save of "servers" or "stacks"
+        
+        Repeated calls within SAVE_DELAY_SECONDS collapse into one write.
+        """
+        with self._lock:
+            if kind == "servers":
+                self._dirty_servers = True
+            elif kind == "stacks":
+                self._dirty_stacks = True
+            
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.SAVE_DELAY_SECONDS, self.flush)
+                self._save_timer.start()
+
+    def flush(self):
+        """Write any pending server/stack changes to disk immediately"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            dirty_servers, self._dirty_servers = self._dirty_servers, False
+            dirty_stacks, self._dirty_stacks = self._dirty_stacks, False
+        
+        if dirty_servers:
+            self.save_config()
+        if dirty_stacks:
+            self.save_stacks()
+
     def add_server(self, name: str, path: str, command: str = "node", args: str = "", port: Optional[int] = None,
                   server_type: str = "nodejs", python_command: Optional[str] = None, venv_path: Optional[str] = None,
                   flaresolverr_type: Optional[str] = None) -> bool:
@@ -108,15 +203,17 @@ class ConfigManager:
         if flaresolverr_type:
             server_config["flaresolverr_type"] = flaresolverr_type
         
-        self.servers[name] = server_config
-        self.save_config()
+        with self._lock:
+            self.servers[name] = server_config
+        self.mark_dirty("servers")
         return True
 
     def remove_server(self, name: str) -> bool:
         """Remove a server configuration"""
         if name in self.servers:
-            del self.servers[name]
-            self.save_config()
+            with self._lock:
+                del self.servers[name]
+            self.mark_dirty("servers")
             return True
         return False
 
@@ -127,38 +224,38 @@ class ConfigManager:
         if name not in self.servers:
             return False
         
-        if path is not None:
-            self.servers[name]["path"] = path
-        if command is not None:
-            self.servers[name]["command"] = command
-        if args is not None:
-            self.servers[name]["args"] = args
-        if port is not None:
-            self.servers[name]["port"] = port
-        if server_type is not None:
-            self.servers[name]["server_type"] = server_type
-        if python_command is not None:
-            self.servers[name]["python_command"] = python_command
-        if venv_path is not None:
-            if venv_path:
-                self.servers[name]["venv_path"] = venv_path
-            else:
-                self.servers[name].pop("venv_path", None)
-        if flaresolverr_type is not None:
-            self.servers[name]["flaresolverr_type"] = flaresolverr_type
-        
-        self.save_config()
+        fields = (
+            ("path", path),
+            ("command", command),
+            ("args", args),
+            ("port", port),
+            ("server_type", server_type),
+            ("python_command", python_command),
+            ("flaresolverr_type", flaresolverr_type),
+        )
+        updates = {key: value for key, value in fields if value is not None}
+        
+        with self._lock:
+            config = self.servers[name]
+            config.update(updates)
+            # An empty venv_path clears the setting
+            if venv_path is not None:
+                if venv_path:
+                    config["venv_path"] = venv_path
+                else:
+                    config.pop("venv_path", None)
+        
+        self.mark_dirty("servers")
         return True
 
     # Stack Management
     
     def load_stacks(self):
         """Load stack configurations"""
-        stacks_file = "stacks.json"
-        if os.path.exists(stacks_file):
+        if os.path.exists(self.stacks_file):
             try:
-                with open(stacks_file, 'r') as f:
-                    self.stacks = json.load(f)
+                with open(self.stacks_file, 'rb') as f:
+                    self.stacks = _loads(f.read())
             except Exception as e:
                 print(f"Error loading stacks: {e}")
                 self.stacks = {}
@@ -167,10 +264,10 @@ class ConfigManager:
 
     def save_stacks(self):
         """Save stack configurations"""
-        stacks_file = "stacks.json"
         try:
-            with open(stacks_file, 'w') as f:
-                json.dump(self.stacks, f, indent=2)
+            # Under the lock, so concurrent saves can't land an older snapshot last
+            with self._lock:
+                _atomic_write(self.stacks_file, _dumps(self.stacks))
         except Exception as e:
             print(f"Error saving stacks: {e}")
 
@@ -179,15 +276,17 @@ class ConfigManager:
         if name in self.stacks:
             return False
         
-        self.stacks[name] = server_names
-        self.save_stacks()
+        with self._lock:
+            self.stacks[name] = server_names
+        self.mark_dirty("stacks")
         return True
 
     def remove_stack(self, name: str) -> bool:
         """Remove a stack configuration"""
         if name in self.stacks:
-            del self.stacks[name]
-            self.save_stacks()
+            with self._lock:
+                del self.stacks[name]
+            self.mark_dirty("stacks")
             return True
         return False
 
@@ -196,8 +295,9 @@ class ConfigManager:
         if name not in self.stacks:
             return False
         
-        self.stacks[name] = server_names
-        self.save_stacks()
+        with self._lock:
+            self.stacks[name] = server_names
+        self.mark_dirty("stacks")
         return True
     
     def get_stacks(self) -> Dict:
@@ -0,0 +1,16 @@
+"""
+Shared pytest setup
+"""
+from unittest.mock import patch
+
+import pytest
+
+from stubs import ProcessStub
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _stub_process_layer():
+    """Replace psutil.Process and the pipe readers once for the whole session"""
+    with patch("psutil.Process", ProcessStub), \
+         patch("server_instance.create_log_reader"):
+        yield
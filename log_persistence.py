@@ -2,11 +2,32 @@
 Log persistence module - saves and loads server logs to/from files
 """
 import os
+import queue
 import threading
+import time
 from pathlib import Path
 from typing import Optional
 from datetime import datetime, timezone, timedelta
 
+# Log files are opened once in append mode; O_APPEND makes every write land
+# at the current end of file atomically, so appends need no Python-level lock.
+_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+
+# Log timestamps are in UTC+7
+_TZ = timezone(timedelta(hours=7))
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# (epoch second, formatted timestamp) of the last formatted second; replaced
+# as a whole tuple so concurrent readers always see a matching pair
+_timestamp_cache: tuple[int, str] = (-1, "")
+
+# Block size used when reading a log file backwards for its last lines
+_TAIL_BLOCK_SIZE = 64 * 1024
+
+# Maximum number of lines waiting for the writer thread; beyond this the
+# oldest queued line is dropped so a runaway server can't exhaust memory
+_QUEUE_MAXSIZE = 10000
+
 
 class LogPersistence:
     """Handles persistent storage of server logs"""
@@ -20,49 +41,183 @@ class LogPersistence:
         """
         self.logs_dir = Path(logs_dir)
         self.logs_dir.mkdir(exist_ok=True)
-        self.locks = {}  # Per-server file locks
-        self._lock = threading.Lock()  # Lock for managing locks dict
+        self._lock = threading.Lock()  # Guards opening/closing of file descriptors
+        self._path_cache: dict[str, Path] = {}  # Sanitized log file path per server
+        self._fds: dict[str, int] = {}  # Open O_APPEND descriptors per server
+        
+        # Log lines are queued by append_log and written by a single background thread
+        self._queue: queue.Queue = queue.Queue(maxsize=_QUEUE_MAXSIZE)
+        self.dropped_lines = 0  # Lines discarded because the queue was full
+        self._writer = threading.Thread(target=self._writer_loop, name="LogWriter", daemon=True)
+        self._writer.start()
     
     def _get_log_file_path(self, server_name: str) -> Path:
         """Get the log file path for a server"""
-        # Sanitize server name for filename
-        safe_name = "".join(c for c in server_name if c.isalnum() or c in (' ', '-', '_')).strip()
-        safe_name = safe_name.replace(' ', '_')
-        return self.logs_dir / f"{safe_name}.log"
+        path = self._path_cache.get(server_name)
+        if path is None:
+            # Sanitize server name for filename
+            safe_name = "".join(c for c in server_name if c.isalnum() or c in (' ', '-', '_')).strip()
+            safe_name = safe_name.replace(' ', '_')
+            path = self.logs_dir / f"{safe_name}.log"
+            self._path_cache[server_name] = path
+        return path
     
-    def _get_lock(self, server_name: str) -> threading.Lock:
-        """Get or create a lock for a server's log file"""
+    def _get_fd(self, server_name: str) -> int:
+        """Get or open the append descriptor for a server's log file"""
+        fd = self._fds.get(server_name)
+        if fd is not None:
+            return fd
         with self._lock:
-            if server_name not in self.locks:
-                self.locks[server_name] = threading.Lock()
-            return self.locks[server_name]
+            fd = self._fds.get(server_name)
+            if fd is None:
+                fd = os.open(self._get_log_file_path(server_name), _OPEN_FLAGS, 0o644)
+                self._fds[server_name] = fd
+            return fd
+    
+    def _close_fd(self, server_name: str):
+        """Close the append descriptor for a server, if open"""
+        with self._lock:
+            fd = self._fds.pop(server_name, None)
+            if fd is not None:
+                os.close(fd)
     
     @staticmethod
     def _get_timestamp() -> str:
         """Get current timestamp in UTC+7 format"""
-        utc_plus_7 = timezone(timedelta(hours=7))
-        now = datetime.now(utc_plus_7)
-        return now.strftime('%Y-%m-%d %H:%M:%S')
+        global _timestamp_cache
+        second = int(time.time())
+        cached_second, cached = _timestamp_cache
+        if second == cached_second:
+            return cached
+        
+        # Bursts of lines within the same second reuse the formatted string
+        formatted = datetime.fromtimestamp(second, _TZ).strftime(_TIMESTAMP_FORMAT)
+        _timestamp_cache = (second, formatted)
+        return formatted
     
     def append_log(self, server_name: str, log_line: str):
         """
         Append a log line to the server's log file with timestamp
         
+        The line is timestamped and queued; the background writer thread
+        performs the actual file I/O.
+        
         Args:
             server_name: Name of the server
             log_line: Log line to append (without timestamp)
         """
-        log_file = self._get_log_file_path(server_name)
-        lock = self._get_lock(server_name)
-        
+        timestamp = self._get_timestamp()
+        item = (server_name, f"{timestamp} {log_line}\n")
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                pass
+            
+            # Queue is full: make room by dropping the oldest pending line
+            try:
+                oldest = self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            self._queue.task_done()
+            self.dropped_lines += 1
+            if oldest is None or isinstance(oldest, threading.Event) or oldest[1] is None:
+                # A stop request, flush or release marker, not a line: keep it, drop this line
+                self._queue.put(oldest)
+                return
+    
+    def _writer_loop(self):
+        """Drain the queue, writing all pending lines of a server in one batch"""
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            
+            # Group lines by server, preserving their order
+            pending: dict[str, list[str]] = {}
+            releases = set()
+            markers = []
+            stop = False
+            for item in batch:
+                if item is None:
+                    stop = True
+                    continue
+                if isinstance(item, threading.Event):
+                    markers.append(item)
+                    continue
+                server_name, line = item
+                if line is None:
+                    releases.add(server_name)
+                    continue
+                pending.setdefault(server_name, []).append(line)
+            
+            for server_name, lines in pending.items():
+                self._write_lines(server_name, lines)
+            
+            # Close after writing; a later line for the server simply reopens the file
+            for server_name in releases:
+                try:
+                    self._close_fd(server_name)
+                except OSError as e:
+                    print(f"Error closing log for {server_name}: {e}")
+            
+            for _ in batch:
+                self._queue.task_done()
+            for marker in markers:
+                marker.set()
+            
+            if stop:
+                return
+    
+    def _write_lines(self, server_name: str, lines: list[str]):
+        """Write a batch of formatted lines to a server's log file"""
         try:
-            with lock:
-                timestamp = self._get_timestamp()
-                with open(log_file, 'a', encoding='utf-8') as f:
-                    f.write(f"{timestamp} {log_line}\n")
+            fd = self._get_fd(server_name)
+            data = memoryview("".join(lines).encode('utf-8'))
+            while data:
+                data = data[os.write(fd, data):]
         except Exception as e:
             print(f"Error writing log for {server_name}: {e}")
     
+    def release(self, server_name: str):
+        """
+        Close a server's log file once its queued lines are written (e.g. when it stops)
+        
+        Does not wait for the writer thread.
+        
+        Args:
+            server_name: Name of the server
+        """
+        if self._writer.is_alive():
+            self._queue.put((server_name, None))
+    
+    def flush(self):
+        """Block until the log lines queued before this call have been written to disk"""
+        if self._writer.is_alive():
+            # Wait for a marker rather than an empty queue, which a chatty server
+            # could postpone indefinitely
+            marker = threading.Event()
+            self._queue.put(marker)
+            while not marker.wait(0.5):
+                if not self._writer.is_alive():
+                    break
+    
+    def close(self):
+        """Write pending log lines, stop the writer thread and close all files"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        
+        for name in list(self._fds.keys()):
+            try:
+                self._close_fd(name)
+            except Exception as e:
+                print(f"Error closing log for {name}: {e}")
+    
     def load_logs(self, server_name: str, max_lines: Optional[int] = None) -> list[str]:
         """
         Load logs from file for a server
@@ -76,15 +231,27 @@ class LogPersistence:
         """
         log_file = self._get_log_file_path(server_name)
         
+        # Make sure queued lines are visible to the reader
+        self.flush()
+        
         if not log_file.exists():
             return []
         
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            # Only read the end of the file when just the tail is wanted
+            if max_lines is not None and max_lines > 0:
+                return self._read_tail(log_file, max_lines)
+            
+            # Read bytes and decode once, like _read_tail (undecodable bytes are replaced)
+            with open(log_file, 'rb') as f:
+                data = f.read()
+            if data.endswith(b'\n'):
+                data = data[:-1]
+            if not data:
+                return []
             
             # Remove trailing newlines
-            lines = [line.rstrip('\n\r') for line in lines]
+            lines = [line.rstrip('\r') for line in data.decode('utf-8', errors='replace').split('\n')]
             
             # Return last N lines if max_lines is specified
             if max_lines is not None and len(lines) > max_lines:
@@ -95,6 +262,27 @@ class LogPersistence:
             print(f"Error reading log for {server_name}: {e}")
             return []
     
+    @staticmethod
+    def _read_tail(log_file: Path, max_lines: int) -> list[str]:
+        """Read the last max_lines lines by scanning backwards from the end of file"""
+        with open(log_file, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            buf = b""
+            # One extra newline guarantees the first kept line is complete
+            while pos > 0 and buf.count(b'\n') <= max_lines:
+                step = min(_TAIL_BLOCK_SIZE, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+        
+        if buf.endswith(b'\n'):
+            buf = buf[:-1]
+        if not buf:
+            return []
+        
+        lines = buf.split(b'\n')[-max_lines:]
+        return [line.decode('utf-8', errors='replace').rstrip('\r') for line in lines]
+    
     def clear_logs(self, server_name: str):
         """
         Clear logs for a server
@@ -103,16 +291,30 @@ class LogPersistence:
             server_name: Name of the server
         """
         log_file = self._get_log_file_path(server_name)
-        lock = self._get_lock(server_name)
+        
+        # Write queued lines first so they don't end up after the clear
+        self.flush()
         
         try:
-            with lock:
-                if log_file.exists():
-                    log_file.unlink()
+            fd = self._fds.get(server_name)
+            if fd is not None:
+                # Truncate in place; O_APPEND writes continue from the new end
+                os.ftruncate(fd, 0)
+            elif log_file.exists():
+                log_file.unlink()
         except Exception as e:
             print(f"Error clearing log for {server_name}: {e}")
     
     def delete_logs(self, server_name: str):
         """Delete log file for a server (when server is removed)"""
-        self.clear_logs(server_name)
+        log_file = self._get_log_file_path(server_name)
+        self.flush()
+        
+        try:
+            self._close_fd(server_name)
+            if log_file.exists():
+                log_file.unlink()
+        except Exception as e:
+            print(f"Error deleting log for {server_name}: {e}")
+        self._path_cache.pop(server_name, None)
 
@@ -3,8 +3,12 @@ Node.js Server Manager - PySide6 Application with System Tray
 """
 import sys
 import ctypes
+import functools
+import time
+from collections import OrderedDict
+from types import MappingProxyType
 from ctypes import wintypes
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout,
     QStackedWidget, QSystemTrayIcon, QMenu, QMessageBox
@@ -24,79 +28,155 @@ from ui.stack_detail import StackDetailView
 
 # Windows API constants
 WM_HOTKEY = 0x0312
+# Byte offset of MSG.message (after the HWND), so it can be read without a MSG wrapper
+_MSG_MESSAGE_OFFSET = wintypes.MSG.message.offset
 MOD_ALT = 0x0001
 MOD_CONTROL = 0x0002
 MOD_SHIFT = 0x0004
 MOD_WIN = 0x0008
 
+# Shortcut string parts -> RegisterHotKey modifier flags / virtual key codes
+_MODIFIER_MAP = MappingProxyType({
+    "CTRL": MOD_CONTROL, "CONTROL": MOD_CONTROL,
+    "ALT": MOD_ALT,
+    "SHIFT": MOD_SHIFT,
+    "WIN": MOD_WIN, "WINDOWS": MOD_WIN,
+})
+_KEY_MAP = MappingProxyType({
+    "F1": 0x70, "F2": 0x71, "F3": 0x72, "F4": 0x73,
+    "F5": 0x74, "F6": 0x75, "F7": 0x76, "F8": 0x77,
+    "F9": 0x78, "F10": 0x79, "F11": 0x7A, "F12": 0x7B,
+    "SPACE": 0x20, "ENTER": 0x0D, "TAB": 0x09,
+    "ESC": 0x1B, "ESCAPE": 0x1B,
+})
+
 
 class GlobalShortcutFilter(QAbstractNativeEventFilter):
-    """Native event filter to catch global hotkey messages"""
+    """Native event filter to catch global hotkey messages (installed on Windows only)"""
+    
+    # Event type of Windows MSG events; older PySide6 versions pass it as str
+    EVENT_TYPE = b"windows_generic_MSG"
     
     def __init__(self, callback):
         super().__init__()
         self.callback = callback
+        # Bound once: the filter sees every native message, keep its fast path short
+        self._event_type = self.EVENT_TYPE
+        self._event_type_str = self.EVENT_TYPE.decode()
+        self._read_uint = ctypes.c_uint.from_address
+        self._message_offset = _MSG_MESSAGE_OFFSET
     
     def nativeEventFilter(self, eventType, message):
         """Filter native events for hotkey messages"""
-        if sys.platform == "win32":
-            # eventType can be bytes or string depending on PySide6 version
-            try:
-                event_type_str = eventType if isinstance(eventType, str) else (eventType.decode('utf-8') if isinstance(eventType, bytes) else str(eventType))
-            except:
-                event_type_str = str(eventType)
-            
-            if "windows" in event_type_str.lower() or "win32" in event_type_str.lower():
-                try:
-                    # Convert VoidPtr to integer, then to ctypes pointer
-                    msg_ptr = ctypes.cast(int(message), ctypes.POINTER(wintypes.MSG))
-                    msg = msg_ptr.contents
-                    if msg.message == WM_HOTKEY:
-                        self.callback()
-                        return True, 0
-                except (ValueError, TypeError, AttributeError, OverflowError) as e:
-                    # Silently ignore conversion errors
-                    pass
+        if eventType != self._event_type and eventType != self._event_type_str:
+            return False, 0
+        try:
+            # Read only MSG.message instead of materializing the whole struct
+            if self._read_uint(int(message) + self._message_offset).value == WM_HOTKEY:
+                self.callback()
+                return True, 0
+        except (ValueError, TypeError, OverflowError):
+            # Silently ignore conversion errors
+            pass
         return False, 0
 
 
+@functools.lru_cache(maxsize=1)
+def _get_tray_icon() -> QIcon:
+    """Paint the system tray icon once; later calls reuse the same QIcon"""
+    pixmap = QPixmap(32, 32)
+    pixmap.fill(QColor(0, 0, 0, 0))  # Transparent background
+    
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    
+    # Draw a simple server/gear icon
+    painter.setBrush(QColor(70, 130, 180))  # Steel blue
+    painter.setPen(QColor(50, 100, 150))
+    painter.drawEllipse(4, 4, 24, 24)
+    
+    # Draw some lines to represent a server
+    painter.setPen(QColor(255, 255, 255))
+    painter.setBrush(QColor(255, 255, 255))
+    painter.drawRect(10, 10, 12, 8)
+    painter.drawRect(10, 20, 12, 4)
+    
+    painter.end()
+    
+    return QIcon(pixmap)
+
+
 class MainWindow(QMainWindow):
     """Main application window"""
     
+    # Number of server detail views kept alive; least recently shown are dropped
+    MAX_SERVER_VIEWS = 8
+    # Hidden server detail views unused for this long are dropped as well
+    SERVER_VIEW_IDLE_SECONDS = 600
+    # Pause between stop and start on restart so the OS can release the port
+    RESTART_DELAY_MS = 500
+    # Start/stop notifications within this window are merged into one tray message
+    TRAY_MESSAGE_DELAY_MS = 500
+    # Signals arriving within this window share one dashboard/sidebar refresh
+    REFRESH_DELAY_MS = 50
+    
     def __init__(self):
         super().__init__()
         self.server_manager = ServerManager()
-        self.server_views: Dict[str, ServerDetailView] = {}
+        self.server_views: "OrderedDict[str, ServerDetailView]" = OrderedDict()
         self.stack_views: Dict[str, StackDetailView] = {}
         self.current_view = None
+        # One reusable single-shot timer coalesces dashboard/sidebar rebuilds
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.REFRESH_DELAY_MS)
+        self._refresh_timer.timeout.connect(self._do_refresh)
+        self._refresh_server_list = False
+        self._refresh_stack_list = False
+        # Pending (event, server name) tray notifications, shown together
+        self._pending_tray_events: List[Tuple[str, str]] = []
+        self._tray_message_timer = QTimer(self)
+        self._tray_message_timer.setSingleShot(True)
+        self._tray_message_timer.setInterval(self.TRAY_MESSAGE_DELAY_MS)
+        self._tray_message_timer.timeout.connect(self._show_tray_events)
         self.hotkey_id = 1  # Unique ID for the hotkey
         self.shortcut_filter = None
+        # user32 hotkey functions and window handle, resolved once (Windows only)
+        self._register_hotkey = None
+        self._unregister_hotkey = None
+        self._hwnd = None
+        # Stays None when the system tray is unavailable
+        self.tray_icon: Optional[QSystemTrayIcon] = None
         self.init_ui()
         self.init_system_tray()
         self.init_global_shortcut()
         
-        # Connect signals to slot handlers
-        self.server_manager.server_status_changed.connect(self.on_server_status_changed)
-        self.server_manager.server_metrics_changed.connect(self.on_server_metrics_changed)
-        self.server_manager.server_started.connect(self.on_server_started)
-        self.server_manager.server_stopped.connect(self.on_server_stopped)
-        self.server_manager.server_log.connect(self.on_server_log)
-        self.server_manager.port_detected.connect(self.on_port_detected)
+        # Connect signals to slot handlers. Signals that can be emitted from worker
+        # threads are queued explicitly: status changes (parallel shutdown), port
+        # detection and metrics (metrics monitor). The rest are always emitted on the
+        # GUI thread and are called directly.
+        queued = Qt.ConnectionType.QueuedConnection
+        direct = Qt.ConnectionType.DirectConnection
+        self.server_manager.server_status_changed.connect(self.on_server_status_changed, queued)
+        # The sidebar needs nothing from MainWindow for status updates, wire it directly
+        self.server_manager.server_status_changed.connect(self.sidebar.update_server_status, queued)
+        self.server_manager.server_metrics_changed.connect(self.on_server_metrics_changed, queued)
+        self.server_manager.server_started.connect(self.on_server_started, direct)
+        self.server_manager.server_stopped.connect(self.on_server_stopped, queued)
+        self.server_manager.server_log_batch.connect(self.on_server_log_batch, direct)
+        self.server_manager.port_detected.connect(self.on_port_detected, queued)
+        # Recorded by the metrics monitor; the dashboard skips the update while hidden
+        self.server_manager.metrics_recorded.connect(self.dashboard_view.update_graphs, queued)
         
         # Stack signals
-        self.server_manager.stack_added.connect(self.on_stack_changed)
-        self.server_manager.stack_removed.connect(self.on_stack_changed)
-        self.server_manager.stack_updated.connect(self.on_stack_changed)
+        self.server_manager.stack_added.connect(self.on_stack_changed, direct)
+        self.server_manager.stack_removed.connect(self.on_stack_changed, direct)
+        self.server_manager.stack_updated.connect(self.on_stack_changed, direct)
         
         # Create and start metrics monitoring thread
         self.metrics_monitor = MetricsMonitor(self.server_manager)
         self.metrics_monitor.start()
         
-        # Lightweight timer for dead process detection only (1 second)
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self.check_process_status)
-        self.status_timer.start(1000)  # Check every 1 second
-        
         # Initial update
         self.update_dashboard()
         self.sidebar.update_server_list(self.server_manager.get_all_servers())
@@ -136,29 +216,6 @@ class MainWindow(QMainWindow):
         # Set Dashboard as initial view
         self.current_view = "dashboard"
     
-    def create_tray_icon(self):
-        """Create a simple icon for the system tray"""
-        pixmap = QPixmap(32, 32)
-        pixmap.fill(QColor(0, 0, 0, 0))  # Transparent background
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Draw a simple server/gear icon
-        painter.setBrush(QColor(70, 130, 180))  # Steel blue
-        painter.setPen(QColor(50, 100, 150))
-        painter.drawEllipse(4, 4, 24, 24)
-        
-        # Draw some lines to represent a server
-        painter.setPen(QColor(255, 255, 255))
-        painter.setBrush(QColor(255, 255, 255))
-        painter.drawRect(10, 10, 12, 8)
-        painter.drawRect(10, 20, 12, 4)
-        
-        painter.end()
-        
-        return QIcon(pixmap)
-    
     def init_system_tray(self):
         """Initialize system tray icon"""
         if not QSystemTrayIcon.isSystemTrayAvailable():
@@ -168,22 +225,12 @@ class MainWindow(QMainWindow):
         
         # Create system tray icon
         self.tray_icon = QSystemTrayIcon(self)
-        # Create a simple icon programmatically
-        icon = self.create_tray_icon()
-        self.tray_icon.setIcon(icon)
+        # Simple icon painted programmatically (once per process)
+        self.tray_icon.setIcon(_get_tray_icon())
         self.tray_icon.setToolTip("Node.js Server Manager")
         
-        # Create tray menu
+        # Create tray menu (actions are built once; update_tray_menu refreshes text)
         self.tray_menu = QMenu()
-        self.update_tray_menu()
-        
-        self.tray_icon.setContextMenu(self.tray_menu)
-        self.tray_icon.activated.connect(self.tray_icon_activated)
-        self.tray_icon.show()
-    
-    def update_tray_menu(self):
-        """Update the tray menu (useful when settings change)"""
-        self.tray_menu.clear()
         
         show_action = QAction("Show Window", self)
         show_action.triggered.connect(self.show)
@@ -202,16 +249,28 @@ class MainWindow(QMainWindow):
         self.tray_menu.addSeparator()
         
         # Show current shortcut in menu
-        shortcut_str = self.server_manager.settings.get("tray_shortcut", "Ctrl+Alt+S")
-        shortcut_info = QAction(f"Shortcut: {shortcut_str}", self)
-        shortcut_info.setEnabled(False)  # Make it non-clickable
-        self.tray_menu.addAction(shortcut_info)
+        self._shortcut_info_action = QAction(self)
+        self._shortcut_info_action.setEnabled(False)  # Make it non-clickable
+        self.tray_menu.addAction(self._shortcut_info_action)
         
         self.tray_menu.addSeparator()
         
         quit_action = QAction("Quit", self)
         quit_action.triggered.connect(self.quit_application)
         self.tray_menu.addAction(quit_action)
+        
+        self.update_tray_menu()
+        
+        self.tray_icon.setContextMenu(self.tray_menu)
+        self.tray_icon.activated.connect(self.tray_icon_activated)
+        self.tray_icon.show()
+    
+    def update_tray_menu(self):
+        """Update the tray menu (useful when settings change)"""
+        if self.tray_icon is None:
+            return
+        shortcut_str = self.server_manager.settings.get("tray_shortcut", "Ctrl+Alt+S")
+        self._shortcut_info_action.setText(f"Shortcut: {shortcut_str}")
     
     def init_global_shortcut(self):
         """Initialize global keyboard shortcut to show/hide window"""
@@ -220,10 +279,7 @@ class MainWindow(QMainWindow):
             return
         
         shortcut_str = self.server_manager.settings.get("tray_shortcut", "Ctrl+Alt+S")
-        if self.register_global_shortcut(shortcut_str):
-            # Install native event filter to catch hotkey messages
-            self.shortcut_filter = GlobalShortcutFilter(self.toggle_window_from_tray)
-            QApplication.instance().installNativeEventFilter(self.shortcut_filter)
+        self.register_global_shortcut(shortcut_str)
     
     def parse_shortcut(self, shortcut_str: str) -> Optional[tuple]:
         """
@@ -233,43 +289,45 @@ class MainWindow(QMainWindow):
         if sys.platform != "win32":
             return None
         
-        parts = shortcut_str.upper().split('+')
         modifiers = 0
         key = None
         
-        for part in parts:
+        for part in shortcut_str.upper().split('+'):
             part = part.strip()
-            if part == "CTRL" or part == "CONTROL":
-                modifiers |= MOD_CONTROL
-            elif part == "ALT":
-                modifiers |= MOD_ALT
-            elif part == "SHIFT":
-                modifiers |= MOD_SHIFT
-            elif part == "WIN" or part == "WINDOWS":
-                modifiers |= MOD_WIN
+            modifier = _MODIFIER_MAP.get(part)
+            if modifier is not None:
+                modifiers |= modifier
+            elif len(part) == 1:
+                # Single character key
+                key = ord(part)
             else:
-                # Assume it's the key
-                if len(part) == 1:
-                    # Single character key
-                    key = ord(part)
-                else:
-                    # Named key - map common keys
-                    key_map = {
-                        "F1": 0x70, "F2": 0x71, "F3": 0x72, "F4": 0x73,
-                        "F5": 0x74, "F6": 0x75, "F7": 0x76, "F8": 0x77,
-                        "F9": 0x78, "F10": 0x79, "F11": 0x7A, "F12": 0x7B,
-                        "SPACE": 0x20, "ENTER": 0x0D, "TAB": 0x09,
-                        "ESC": 0x1B, "ESCAPE": 0x1B,
-                    }
-                    key = key_map.get(part)
-                    if key is None:
-                        return None
+                # Named key
+                key = _KEY_MAP.get(part)
+                if key is None:
+                    return None
         
         if key is None:
             return None
         
         return (modifiers, key)
     
+    def _load_hotkey_api(self):
+        """Resolve RegisterHotKey/UnregisterHotKey with declared signatures and cache the window handle"""
+        if self._register_hotkey is not None:
+            return
+        
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+        register_hotkey = user32.RegisterHotKey
+        register_hotkey.argtypes = [wintypes.HWND, ctypes.c_int, wintypes.UINT, wintypes.UINT]
+        register_hotkey.restype = wintypes.BOOL
+        unregister_hotkey = user32.UnregisterHotKey
+        unregister_hotkey.argtypes = [wintypes.HWND, ctypes.c_int]
+        unregister_hotkey.restype = wintypes.BOOL
+        
+        self._register_hotkey = register_hotkey
+        self._unregister_hotkey = unregister_hotkey
+        self._hwnd = wintypes.HWND(int(self.winId()))
+    
     def register_global_shortcut(self, shortcut_str: str) -> bool:
         """
         Register a global hotkey using Windows API
@@ -285,18 +343,14 @@ class MainWindow(QMainWindow):
         
         modifiers, vk_code = parsed
         
-        # Get user32.dll functions
-        user32 = ctypes.windll.user32
-        
-        # Get window handle
-        hwnd = int(self.winId())
+        self._load_hotkey_api()
         
         # Unregister existing hotkey if already registered
-        user32.UnregisterHotKey(hwnd, self.hotkey_id)
+        self._unregister_hotkey(self._hwnd, self.hotkey_id)
         
         # Register the hotkey
         # RegisterHotKey(hwnd, id, modifiers, vk)
-        result = user32.RegisterHotKey(hwnd, self.hotkey_id, modifiers, vk_code)
+        result = self._register_hotkey(self._hwnd, self.hotkey_id, modifiers, vk_code)
         
         if result == 0:
             error = ctypes.get_last_error()
@@ -306,18 +360,24 @@ class MainWindow(QMainWindow):
                 print(f"Failed to register hotkey {shortcut_str}: error {error}")
             return False
         
+        # Install the native event filter only while a hotkey is registered,
+        # so native messages don't go through Python when there is nothing to catch
+        if self.shortcut_filter is None:
+            self.shortcut_filter = GlobalShortcutFilter(self.toggle_window_from_tray)
+            QApplication.instance().installNativeEventFilter(self.shortcut_filter)
+        
         return True
     
     def unregister_global_shortcut(self):
         """Unregister the global hotkey"""
-        if sys.platform == "win32":
+        if sys.platform == "win32" and self._unregister_hotkey is not None:
             try:
-                hwnd = int(self.winId())
-                ctypes.windll.user32.UnregisterHotKey(hwnd, self.hotkey_id)
+                self._unregister_hotkey(self._hwnd, self.hotkey_id)
             except:
                 pass
         if self.shortcut_filter:
             QApplication.instance().removeNativeEventFilter(self.shortcut_filter)
+            self.shortcut_filter = None
     
     def toggle_window_from_tray(self):
         """Toggle window visibility when shortcut is pressed"""
@@ -347,7 +407,7 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Handle window close event"""
-        if self.tray_icon.isVisible():
+        if self.tray_icon is not None and self.tray_icon.isVisible():
             self.hide()
             event.ignore()
         else:
@@ -361,6 +421,7 @@ class MainWindow(QMainWindow):
         if hasattr(self, 'metrics_monitor'):
             self.metrics_monitor.stop()
         self.server_manager.stop_all_servers()
+        self.server_manager.close()
         QApplication.quit()
     
     def on_sidebar_item_selected(self, name: str):
@@ -370,40 +431,84 @@ class MainWindow(QMainWindow):
             self.current_view = "dashboard"
         else:
             # Server detail view
-            if name not in self.server_views:
-                # Create new server detail view
+            if name in self.server_views:
+                server_view = self.server_views[name]
+                self.server_views.move_to_end(name)
+                # Hidden views don't receive logs/metrics, catch up from storage
+                reload_logs = True
+            else:
+                # Create new server detail view (it loads its logs itself)
                 server_view = ServerDetailView(name, self)
                 self.server_views[name] = server_view
                 self.stacked_widget.addWidget(server_view)
-                
-                # Update with current server data
-                servers = self.server_manager.get_all_servers()
-                if name in servers:
-                    config = servers[name].copy()
-                    config["name"] = name
-                    server_view.update_server_info(config)
-                    status = self.server_manager.get_server_status(name)
-                    server_view.update_status(status)
-                    
-                    # If server is running, try to get current metrics
-                    if status == "running" and name in self.server_manager.psutil_processes:
-                        metrics = self.server_manager.get_server_metrics(name)
-                        if metrics:
-                            server_view.update_metrics(metrics)
-                        else:
-                            # Initialize with zero metrics if not available yet
-                            server_view.update_metrics({"cpu_percent": 0, "memory_mb": 0})
-                    else:
-                        server_view.update_metrics({"cpu_percent": 0, "memory_mb": 0})
-                    
-                    # Check for detected port
-                    detected_port = self.server_manager.get_detected_port(name)
-                    if detected_port:
-                        server_view.update_detected_port(detected_port)
+                reload_logs = False
             
             # Switch to server view
-            self.stacked_widget.setCurrentWidget(self.server_views[name])
+            self.stacked_widget.setCurrentWidget(server_view)
             self.current_view = name
+            self._evict_server_views()
+            
+            # Pull logs, metrics and port after the switch has been painted
+            QTimer.singleShot(0, functools.partial(self._populate_server_view, name, reload_logs))
+    
+    def _populate_server_view(self, name: str, reload_logs: bool = False):
+        """
+        Fill the shown server detail view with the current server data
+        
+        Args:
+            name: Server name
+            reload_logs: Reload the log area from persistent storage
+        """
+        # The user may have switched away already; the view is filled when shown again
+        if self.current_view != name or name not in self.server_views:
+            return
+        
+        server_view = self.server_views[name]
+        if reload_logs:
+            server_view.load_persistent_logs()
+        
+        servers = self.server_manager.get_all_servers()
+        if name in servers:
+            config = servers[name].copy()
+            config["name"] = name
+            server_view.update_server_info(config)
+            status = self.server_manager.get_server_status(name)
+            server_view.update_status(status)
+            
+            # If server is running, try to get current metrics
+            if status == "running" and name in self.server_manager.psutil_processes:
+                metrics = self.server_manager.get_server_metrics(name)
+                if metrics:
+                    server_view.update_metrics(metrics)
+                else:
+                    # Initialize with zero metrics if not available yet
+                    server_view.update_metrics({"cpu_percent": 0, "memory_mb": 0})
+            else:
+                server_view.update_metrics({"cpu_percent": 0, "memory_mb": 0})
+            
+            # Check for detected port
+            detected_port = self.server_manager.get_detected_port(name)
+            if detected_port:
+                server_view.update_detected_port(detected_port)
+    
+    def _evict_server_views(self):
+        """Drop idle hidden server views and the least recently shown beyond MAX_SERVER_VIEWS"""
+        now = time.monotonic()
+        for name, view in list(self.server_views.items()):
+            if name != self.current_view and now - view.last_visible > self.SERVER_VIEW_IDLE_SECONDS:
+                self._discard_server_view(name)
+        
+        while len(self.server_views) > self.MAX_SERVER_VIEWS:
+            name = next(iter(self.server_views))
+            self._discard_server_view(name)
+    
+    def _discard_server_view(self, name: str):
+        """Remove a server detail view from the stack and free it"""
+        view = self.server_views.pop(name, None)
+        if view is not None:
+            view.graph_update_timer.stop()
+            self.stacked_widget.removeWidget(view)
+            view.deleteLater()
     
     def on_sidebar_context_action(self, action: str, server_name: str):
         """Handle context menu actions from sidebar"""
@@ -420,83 +525,109 @@ class MainWindow(QMainWindow):
     
     def update_dashboard(self):
         """Update the dashboard view"""
-        self.dashboard_view.update_table(self.server_manager)
+        self.dashboard_view.update_summary_stats(self.server_manager)
     
-    def check_process_status(self):
-        """Lightweight method for timer - only checks for dead processes"""
-        # Just check status for all servers (will emit signals if status changes)
-        self.server_manager.get_all_servers()
+    def _schedule_refresh(self, server_list: bool = False, stack_list: bool = False):
+        """
+        Coalesce dashboard (and optionally sidebar list) refreshes
+        
+        Args:
+            server_list: Also rebuild the sidebar server list
+            stack_list: Also rebuild the sidebar stack list
+        """
+        self._refresh_server_list = self._refresh_server_list or server_list
+        self._refresh_stack_list = self._refresh_stack_list or stack_list
+        # Don't restart a pending timer, a steady signal stream would postpone it forever
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+    
+    def _do_refresh(self):
+        """Run the refresh requested by _schedule_refresh once"""
+        refresh_server_list = self._refresh_server_list
+        refresh_stack_list = self._refresh_stack_list
+        self._refresh_server_list = False
+        self._refresh_stack_list = False
+        
+        self.update_dashboard()
+        if refresh_server_list:
+            self.sidebar.update_server_list(self.server_manager.get_all_servers())
+        if refresh_stack_list:
+            self.sidebar.update_stack_list(self.server_manager.get_stacks())
     
     def on_server_status_changed(self, name: str, status: str):
         """Handle server status change signal - update both Dashboard and detail view"""
-        # Update Dashboard table
-        self.dashboard_view.on_server_status_changed(name, status)
-        self.dashboard_view.update_summary_stats(self.server_manager)
-        
-        # Update sidebar status and button color
-        self.sidebar.update_server_status(name, status)
+        # Update Dashboard summary (the sidebar is connected to the signal directly)
+        self._schedule_refresh()
         
         # Update ServerDetailView if visible
         if name in self.server_views:
             self.server_views[name].update_status(status)
-            
-        # Update StackDetailViews (they might contain this server)
-        for view in self.stack_views.values():
-            view.update_status()
     
     def on_server_metrics_changed(self, name: str, metrics: dict):
         """Handle server metrics change signal - update both Dashboard and detail view"""
-        # Update Dashboard table
-        self.dashboard_view.on_server_metrics_changed(name, metrics)
-        self.dashboard_view.update_summary_stats(self.server_manager)
+        # Update Dashboard summary
+        self._schedule_refresh()
         
-        # Update ServerDetailView if visible
-        if name in self.server_views:
+        # Update ServerDetailView if visible (hidden views refresh when shown)
+        if self.current_view == name:
             self.server_views[name].update_metrics(metrics)
     
     def on_server_started(self, name: str):
         """Handle server started signal"""
-        self.update_dashboard()
-        self.sidebar.update_server_list(self.server_manager.get_all_servers())
+        self._schedule_refresh(server_list=True)
         
         # Update ServerDetailView if visible
         if name in self.server_views:
             self.server_views[name].update_status("running")
-            
-        # Update StackDetailViews (they might contain this server)
-        for view in self.stack_views.values():
-            view.update_status()
         
-        self.tray_icon.showMessage("Server Started", f"Server '{name}' has been started.")
+        self._queue_tray_event("started", name)
     
     def on_server_stopped(self, name: str):
         """Handle server stopped signal"""
-        # Update Dashboard table
-        self.dashboard_view.on_server_stopped(name)
-        self.dashboard_view.update_summary_stats(self.server_manager)
+        # Update Dashboard summary
+        self._schedule_refresh()
         
         # Update ServerDetailView if visible
         if name in self.server_views:
             self.server_views[name].update_status("stopped")
             self.server_views[name].update_metrics({"cpu_percent": 0, "memory_mb": 0})
-            
-        # Update StackDetailViews (they might contain this server)
-        for view in self.stack_views.values():
-            view.update_status()
         
-        self.tray_icon.showMessage("Server Stopped", f"Server '{name}' has been stopped.")
+        self._queue_tray_event("stopped", name)
     
-    def on_server_log(self, name: str, log_line: str, is_error: bool):
-        """Handle server log signal - save to persistent storage and forward to ServerDetailView if visible"""
-        # Save log to persistent storage
-        self.server_manager.save_log(name, log_line)
-        # Forward to ServerDetailView if visible
-        if name in self.server_views:
-            self.server_views[name].append_log(log_line, is_error)
-        # Try to detect port from new log (non-blocking, quick check)
+    def _queue_tray_event(self, event: str, name: str):
+        """Queue a "started"/"stopped" tray notification for a server"""
+        self._pending_tray_events.append((event, name))
+        if not self._tray_message_timer.isActive():
+            self._tray_message_timer.start()
+    
+    def _show_tray_events(self):
+        """Show the queued start/stop events as a single tray notification"""
+        events = self._pending_tray_events
+        self._pending_tray_events = []
+        if not events or self.tray_icon is None:
+            return
+        
+        if len(events) == 1:
+            event, name = events[0]
+            self.tray_icon.showMessage(f"Server {event.title()}", f"Server '{name}' has been {event}.")
+            return
+        
+        lines = []
+        for event in ("started", "stopped"):
+            names = [name for kind, name in events if kind == event]
+            if names:
+                lines.append(f"{event.title()} {len(names)} server(s): {', '.join(names)}")
+        self.tray_icon.showMessage("Servers Updated", "\n".join(lines))
+    
+    def on_server_log_batch(self, name: str, lines: list):
+        """Handle a batch of server log lines - forward to ServerDetailView if visible (persisted by the log reader)"""
+        # Forward to ServerDetailView if visible (hidden views reload logs when shown)
+        if self.current_view == name:
+            self.server_views[name].append_logs(lines)
+        # Try to detect port from new logs (coalesced per server, runs at most every 200 ms)
         # Only check if we don't already have a detected port
-        if name not in self.server_manager.detected_ports or self.server_manager.detected_ports[name] is None:
-            self.server_manager.detect_port(name)
+        if self.server_manager.detected_ports.get(name) is None:
+            self.server_manager.schedule_port_detection(name)
     
     def on_port_detected(self, name: str, port: int):
         """Handle port detection signal - update ServerDetailView if visible"""
@@ -529,8 +660,7 @@ class MainWindow(QMainWindow):
                 data.get("venv_path"),
                 data.get("flaresolverr_type")
             ):
-                self.update_dashboard()
-                self.sidebar.update_server_list(self.server_manager.get_all_servers())
+                self._schedule_refresh(server_list=True)
                 QMessageBox.information(self, "Success", "Server added successfully.")
             else:
                 QMessageBox.warning(self, "Error", "Server name already exists.")
@@ -561,7 +691,7 @@ class MainWindow(QMainWindow):
                 venv_path,
                 data.get("flaresolverr_type")
             ):
-                self.update_dashboard()
+                self._schedule_refresh()
                 # Update detail view if visible
                 if name in self.server_views:
                     config = self.server_manager.servers[name].copy()
@@ -587,19 +717,14 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.Yes:
             if self.server_manager.remove_server(name):
                 # Remove detail view if exists
-                if name in self.server_views:
-                    view = self.server_views[name]
-                    self.stacked_widget.removeWidget(view)
-                    view.deleteLater()
-                    del self.server_views[name]
+                self._discard_server_view(name)
                 
                 # If this was the current view, switch to dashboard
                 if self.current_view == name:
                     self.on_sidebar_item_selected("dashboard")
                     self.sidebar.select_item("dashboard")
                 
-                self.update_dashboard()
-                self.sidebar.update_server_list(self.server_manager.get_all_servers())
+                self._schedule_refresh(server_list=True)
                 QMessageBox.information(self, "Success", "Server removed successfully.")
             else:
                 QMessageBox.warning(self, "Error", "Failed to remove server.")
@@ -636,8 +761,16 @@ class MainWindow(QMainWindow):
         pass
     
     def restart_server_by_name(self, name: str):
-        """Restart server by name"""
-        if self.server_manager.restart_server(name):
+        """Restart server by name (the start is scheduled on the event loop, not slept for)"""
+        if self.server_manager.stop_server(name):
+            QTimer.singleShot(self.RESTART_DELAY_MS, functools.partial(self._finish_restart, name))
+        else:
+            # Not running, start right away
+            self._finish_restart(name)
+    
+    def _finish_restart(self, name: str):
+        """Start phase of restart_server_by_name"""
+        if self.server_manager.start_server(name):
             # Signal will handle UI update
             pass
         else:
@@ -715,7 +848,7 @@ class MainWindow(QMainWindow):
                 
     def on_stack_changed(self):
         """Handle stack added/removed/updated"""
-        self.sidebar.update_stack_list(self.server_manager.get_stacks())
+        self._schedule_refresh(stack_list=True)
         # Update any active stack views
         for view in self.stack_views.values():
             view.update_stack_info()
@@ -1,14 +1,123 @@
 """
 Metrics persistence module - saves and loads server metrics to/from files
+
+Each server's metrics are an append-only log of fixed-size binary records
+(timestamp, cpu, ram), so recording a sample is a single small write instead of
+a file rewrite, and reading a file needs no text parsing. Values are stored as
+integers at the resolution the graphs need (milliseconds, 0.01 % CPU, 1 KiB
+RAM), 16 bytes per record after a short header. Range queries on a file that
+isn't loaded yet map it read-only and binary-search the fixed-size records, so
+only the requested rows are unpacked; the mapping is closed again right away,
+as a file that stays mapped can't be replaced or deleted on Windows. Once a
+whole file has been read it is cached in memory as parallel arrays. Samples are
+queued by callers and written in batches by a background writer thread.
 """
 import os
 import json
+import mmap
+import queue
+import struct
 import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Tuple
-from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterable, Optional, List, Tuple
 import time
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to the stdlib json module
+    orjson = None
+
+
+def _loads(data: bytes):
+    """Parse JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# File header: magic and format version
+_HEADER = b"SMET\x02\x00\x00\x00"
+# On-disk record: timestamp in ms, CPU in 0.01 % units and RAM in KiB (little-endian)
+_RECORD = struct.Struct('<qII')
+# Record of format version 1 files (no header): timestamp, CPU percent and RAM MB as float64
+_LEGACY_RECORD = struct.Struct('<ddd')
+_UINT32_MAX = 0xFFFFFFFF
+
+
+def _encode(timestamp: float, cpu: float, ram: float) -> Tuple[int, int, int]:
+    """Convert a data point to the integer fields of a record"""
+    return (round(timestamp * 1000),
+            min(max(round(cpu * 100), 0), _UINT32_MAX),
+            min(max(round(ram * 1024), 0), _UINT32_MAX))
+
+
+def _decode(records: Iterable[Tuple[int, int, int]]) -> List[Tuple[float, float, float]]:
+    """Convert unpacked records back to (timestamp, cpu, ram) data points"""
+    return [(ms / 1000, centi / 100, kib / 1024) for ms, centi, kib in records]
+
+
+def quantize(timestamp: float, cpu: float, ram: float) -> Tuple[float, float, float]:
+    """Round a data point to the resolution it is stored with"""
+    return _decode((_encode(timestamp, cpu, ram),))[0]
+
+
+class MetricSeries:
+    """Data points of one metrics file stored column-wise, ordered by timestamp"""
+    
+    __slots__ = ("timestamps", "cpu", "ram")
+    
+    def __init__(self):
+        self.timestamps = array('d')
+        self.cpu = array('d')
+        self.ram = array('d')
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    def append(self, timestamp: float, cpu: float, ram: float):
+        self.timestamps.append(timestamp)
+        self.cpu.append(cpu)
+        self.ram.append(ram)
+    
+    def extend(self, points: Iterable[Tuple[float, float, float]]):
+        for timestamp, cpu, ram in points:
+            self.append(timestamp, cpu, ram)
+    
+    def trim_before(self, cutoff_time: float) -> int:
+        """Drop data points older than cutoff_time, returning how many were dropped"""
+        index = bisect_left(self.timestamps, cutoff_time)
+        if index:
+            del self.timestamps[:index]
+            del self.cpu[:index]
+            del self.ram[:index]
+        return index
+    
+    def points(self, start_time: Optional[float] = None,
+               end_time: Optional[float] = None) -> List[Tuple[float, float, float]]:
+        """Get (timestamp, cpu, ram) tuples within an inclusive time range"""
+        lo = 0 if start_time is None else bisect_left(self.timestamps, start_time)
+        hi = len(self.timestamps) if end_time is None else bisect_right(self.timestamps, end_time)
+        return list(zip(self.timestamps[lo:hi], self.cpu[lo:hi], self.ram[lo:hi]))
+
+
+class _RecordTimestamps:
+    """Read-only sequence of the millisecond timestamps in a buffer of records, for bisect"""
+    
+    __slots__ = ("buffer", "count")
+    
+    def __init__(self, buffer, count: int):
+        self.buffer = buffer
+        self.count = count
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __getitem__(self, index: int) -> int:
+        return _RECORD.unpack_from(self.buffer, len(_HEADER) + index * _RECORD.size)[0]
+
 
 class MetricsPersistence:
     """Handles persistent storage of server metrics"""
@@ -22,63 +131,216 @@ class MetricsPersistence:
         """
         self.metrics_dir = Path(metrics_dir)
         self.metrics_dir.mkdir(exist_ok=True)
-        self.locks = {}  # Per-server file locks
-        self._lock = threading.Lock()  # Lock for managing locks dict
+        self.locks: Dict[Path, threading.Lock] = {}  # Per-file locks
+        self._path_cache: Dict[str, Path] = {}  # Sanitized metrics file path per server
         self.max_age_seconds = 86400  # 24 hours
+        self.cleanup_interval = 100  # Appends between age-based cleanups of a file
+        self.flush_interval = 50  # Buffered appends before they are written to disk
+        self.flush_max_age = 30.0  # Seconds a buffered data point may wait to be written
+        # The following are keyed by metrics file and guarded by that file's lock
+        self._append_counts: Dict[Path, int] = {}  # Appends since the last cleanup
+        self._cache: Dict[Path, MetricSeries] = {}  # Data points on disk + pending
+        self._pending: Dict[Path, List[Tuple[float, float, float]]] = {}  # Not yet written
+        
+        # Data points are queued by the append methods and recorded by a single background thread
+        self._queue: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name="MetricsWriter", daemon=True)
+        self._writer.start()
     
     def _get_metrics_file_path(self, server_name: str) -> Path:
         """Get the metrics file path for a server"""
-        # Sanitize server name for filename
-        safe_name = "".join(c for c in server_name if c.isalnum() or c in (' ', '-', '_')).strip()
-        safe_name = safe_name.replace(' ', '_')
-        return self.metrics_dir / f"{safe_name}.json"
-    
-    def _get_lock(self, server_name: str) -> threading.Lock:
-        """Get or create a lock for a server's metrics file"""
-        with self._lock:
-            if server_name not in self.locks:
-                self.locks[server_name] = threading.Lock()
-            return self.locks[server_name]
+        path = self._path_cache.get(server_name)
+        if path is None:
+            # Sanitize server name for filename
+            safe_name = "".join(c for c in server_name if c.isalnum() or c in (' ', '-', '_')).strip()
+            safe_name = safe_name.replace(' ', '_')
+            path = self.metrics_dir / f"{safe_name}.bin"
+            self._path_cache[server_name] = path
+        return path
+    
+    @classmethod
+    def _read_file(cls, metrics_file: Path) -> List[Tuple[float, float, float]]:
+        """Read all data points of a metrics file, dropping a partially written last record"""
+        with open(metrics_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            legacy = size and f.read(len(_HEADER)) != _HEADER
+            body = 0 if legacy else max(size - len(_HEADER), 0)
+            usable = body - body % _RECORD.size
+            metrics = []
+            if usable:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        metrics = _decode(_RECORD.iter_unpack(view[len(_HEADER):len(_HEADER) + usable]))
+        if legacy:
+            # Converted once the file is closed (it can't be replaced while open on Windows)
+            return cls._convert_legacy_file(metrics_file)
+        if usable != body:
+            # Keep later appends aligned to record boundaries
+            os.truncate(metrics_file, len(_HEADER) + usable)
+        return metrics
+    
+    @classmethod
+    def _convert_legacy_file(cls, metrics_file: Path) -> List[Tuple[float, float, float]]:
+        """Rewrite a float64 record file (format version 1) in the current format"""
+        with open(metrics_file, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % _LEGACY_RECORD.size
+        metrics = [quantize(*m) for m in _LEGACY_RECORD.iter_unpack(data[:usable])]
+        cls._replace_file(metrics_file, metrics)
+        return metrics
+    
+    @classmethod
+    def _read_range(cls, metrics_file: Path, start_time: float,
+                    end_time: Optional[float] = None) -> List[Tuple[float, float, float]]:
+        """Read only the records within a time range, locating them by binary search on disk"""
+        with open(metrics_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            legacy = size and f.read(len(_HEADER)) != _HEADER
+            if not legacy:
+                count = max(size - len(_HEADER), 0) // _RECORD.size
+                if not count:
+                    return []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    timestamps = _RecordTimestamps(mm, count)
+                    lo = bisect_left(timestamps, start_time * 1000)
+                    hi = count if end_time is None else bisect_right(timestamps, end_time * 1000)
+                    if lo >= hi:
+                        return []
+                    offset = len(_HEADER)
+                    with memoryview(mm) as view:
+                        return _decode(_RECORD.iter_unpack(
+                            view[offset + lo * _RECORD.size:offset + hi * _RECORD.size]))
+        
+        # Legacy file: converted on first read, later reads use the binary search
+        return [m for m in cls._convert_legacy_file(metrics_file)
+                if m[0] >= start_time and (end_time is None or m[0] <= end_time)]
+    
+    @staticmethod
+    def _pack(metrics: Iterable[Tuple[float, float, float]]) -> bytes:
+        pack = _RECORD.pack
+        return b"".join(pack(*_encode(*m)) for m in metrics)
+    
+    def _get_lock(self, metrics_file: Path) -> threading.Lock:
+        """Get or create the lock for a metrics file"""
+        lock = self.locks.get(metrics_file)
+        if lock is None:
+            # setdefault is atomic, racing callers all end up with the same lock
+            lock = self.locks.setdefault(metrics_file, threading.Lock())
+        return lock
+    
+    def _get_cache(self, metrics_file: Path) -> MetricSeries:
+        """Get the cached data points of a metrics file, reading it on first use (lock held)"""
+        cache = self._cache.get(metrics_file)
+        if cache is None:
+            cache = MetricSeries()
+            if metrics_file.exists():
+                cache.extend(sorted(self._read_file(metrics_file)))
+            self._cache[metrics_file] = cache
+        return cache
+    
+    def _write_pending(self, metrics_file: Path):
+        """Append buffered data points to the metrics file (lock held)"""
+        pending = self._pending.pop(metrics_file, None)
+        if pending:
+            with open(metrics_file, 'ab') as f:
+                data = self._pack(pending)
+                if not f.tell():
+                    data = _HEADER + data
+                f.write(data)
     
     def append_metric(self, server_name: str, timestamp: float, cpu: float, ram: float):
         """
         Append a metric data point to the server's metrics file
         
+        The data point is queued; the background writer thread updates the
+        cache and performs the file I/O.
+        
         Args:
             server_name: Name of the server
             timestamp: Unix timestamp (float)
             cpu: CPU usage percentage
             ram: RAM usage in MB
         """
+        self._queue.put((server_name, [(timestamp, cpu, ram)]))
+    
+    def append_metrics_batch(self, server_name: str, metrics: List[Tuple[float, float, float]]):
+        """
+        Append several data points to the server's metrics file at once
+        
+        Args:
+            server_name: Name of the server
+            metrics: (timestamp, cpu, ram) tuples in time order
+        """
+        if metrics:
+            self._queue.put((server_name, metrics))
+    
+    def _writer_loop(self):
+        """Record queued data points until the stop sentinel arrives"""
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            
+            stop = False
+            markers = []
+            for item in batch:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                elif item[1] is None:
+                    self._write_all_pending(item[0])
+                else:
+                    self._record(*item)
+            
+            for _ in batch:
+                self._queue.task_done()
+            for marker in markers:
+                marker.set()
+            
+            if stop:
+                return
+    
+    def _wait_for_writer(self):
+        """Block until the data points queued before this call have been recorded"""
+        if self._writer.is_alive():
+            # Wait for a marker rather than an empty queue, which a steady stream of
+            # new samples could postpone indefinitely
+            marker = threading.Event()
+            self._queue.put(marker)
+            while not marker.wait(0.5):
+                if not self._writer.is_alive():
+                    break
+    
+    def _record(self, server_name: str, metrics: List[Tuple[float, float, float]]):
+        """Add data points to the cache and write them out with the next batch (writer thread)"""
         metrics_file = self._get_metrics_file_path(server_name)
-        lock = self._get_lock(server_name)
+        lock = self._get_lock(metrics_file)
         
         try:
+            # The cache holds what a later read of the file would return
+            metrics = [quantize(*m) for m in metrics]
             with lock:
-                # Load existing data
-                metrics = []
-                if metrics_file.exists():
-                    try:
-                        with open(metrics_file, 'r', encoding='utf-8') as f:
-                            metrics = json.load(f)
-                    except (json.JSONDecodeError, IOError):
-                        # File corrupted or empty, start fresh
-                        metrics = []
-                
-                # Append new metric [timestamp, cpu, ram]
-                metrics.append([timestamp, cpu, ram])
-                
-                # Cleanup old data periodically (every 100 records to avoid frequent rewrites)
-                if len(metrics) % 100 == 0:
-                    current_time = time.time()
-                    cutoff_time = current_time - self.max_age_seconds
-                    metrics = [m for m in metrics if m[0] >= cutoff_time]
-                
-                # Save back to file
-                with open(metrics_file, 'w', encoding='utf-8') as f:
-                    json.dump(metrics, f)
+                cache = self._get_cache(metrics_file)
+                for timestamp, cpu, ram in metrics:
+                    cache.append(timestamp, cpu, ram)
+                pending = self._pending.setdefault(metrics_file, [])
+                pending.extend(metrics)
+                if (len(pending) >= self.flush_interval
+                        or pending[-1][0] - pending[0][0] >= self.flush_max_age):
+                    self._write_pending(metrics_file)
+                count = self._append_counts.get(metrics_file, 0) + len(metrics)
+                self._append_counts[metrics_file] = count
         except Exception as e:
             print(f"Error writing metrics for {server_name}: {e}")
+            return
+        
+        # Cleanup old data periodically (every 100 records to avoid frequent rewrites)
+        if count >= self.cleanup_interval:
+            self.cleanup_old_data(server_name)
     
     def load_metrics(self, server_name: str, start_time: Optional[float] = None, 
                      end_time: Optional[float] = None) -> List[Tuple[float, float, float]]:
@@ -94,25 +356,24 @@ class MetricsPersistence:
             List of (timestamp, cpu, ram) tuples
         """
         metrics_file = self._get_metrics_file_path(server_name)
+        lock = self._get_lock(metrics_file)
         
-        if not metrics_file.exists():
-            return []
+        # Make sure queued data points are visible to the reader
+        self._wait_for_writer()
         
         try:
-            with open(metrics_file, 'r', encoding='utf-8') as f:
-                metrics = json.load(f)
-            
-            # Convert from [[ts, cpu, ram], ...] to [(ts, cpu, ram), ...]
-            result = [(m[0], m[1], m[2]) for m in metrics]
-            
-            # Filter by time range if specified
-            if start_time is not None:
-                result = [(ts, cpu, ram) for ts, cpu, ram in result if ts >= start_time]
-            if end_time is not None:
-                result = [(ts, cpu, ram) for ts, cpu, ram in result if ts <= end_time]
-            
-            return result
-        except (json.JSONDecodeError, IOError) as e:
+            with lock:
+                cache = self._cache.get(metrics_file)
+                if cache is None and start_time is not None:
+                    # Recent-data query on a file that isn't cached: read just that range
+                    # instead of loading the whole file
+                    if not metrics_file.exists():
+                        return []
+                    return self._read_range(metrics_file, start_time, end_time)
+                
+                # Timestamps are sorted, so the range is found by binary search
+                return self._get_cache(metrics_file).points(start_time, end_time)
+        except IOError as e:
             print(f"Error reading metrics for {server_name}: {e}")
             return []
     
@@ -128,32 +389,69 @@ class MetricsPersistence:
             max_age_seconds = self.max_age_seconds
         
         metrics_file = self._get_metrics_file_path(server_name)
-        lock = self._get_lock(server_name)
-        
-        if not metrics_file.exists():
-            return
+        lock = self._get_lock(metrics_file)
+        cutoff_time = time.time() - max_age_seconds
         
         try:
             with lock:
+                self._append_counts[metrics_file] = 0
+                
+                cache = self._cache.get(metrics_file)
+                if cache is not None:
+                    # The cache mirrors the file plus pending points, so rewrite from it
+                    if cache.trim_before(cutoff_time):
+                        self._replace_file(metrics_file, cache.points())
+                        self._pending.pop(metrics_file, None)
+                    return
+                
+                if not metrics_file.exists():
+                    return
+                
                 # Load existing data
                 try:
-                    with open(metrics_file, 'r', encoding='utf-8') as f:
-                        metrics = json.load(f)
-                except (json.JSONDecodeError, IOError):
+                    metrics = self._read_file(metrics_file)
+                except IOError:
                     return
                 
                 # Filter out old data
-                current_time = time.time()
-                cutoff_time = current_time - max_age_seconds
                 filtered_metrics = [m for m in metrics if m[0] >= cutoff_time]
                 
                 # Only rewrite if data was removed
                 if len(filtered_metrics) < len(metrics):
-                    with open(metrics_file, 'w', encoding='utf-8') as f:
-                        json.dump(filtered_metrics, f)
+                    self._replace_file(metrics_file, filtered_metrics)
         except Exception as e:
             print(f"Error cleaning up metrics for {server_name}: {e}")
     
+    @classmethod
+    def _replace_file(cls, metrics_file: Path, metrics: Iterable[Tuple[float, float, float]]):
+        """Atomically replace a metrics file with the given data points"""
+        # The old file stays intact until the rename, so a crash can't lose history
+        tmp_file = metrics_file.with_name(f"{metrics_file.name}.tmp")
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(_HEADER + cls._pack(metrics))
+            os.replace(tmp_file, metrics_file)
+        except BaseException:
+            if tmp_file.exists():
+                tmp_file.unlink()
+            raise
+    
+    def _migrate_legacy_file(self, legacy_file: Path):
+        """Convert a metrics file from the old JSON array format to the binary log"""
+        metrics_file = legacy_file.with_suffix(".bin")
+        try:
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
+            with open(legacy_file, 'rb') as f:
+                metrics = _loads(f.read())
+            if not metrics_file.exists():
+                self._replace_file(metrics_file, [(m[0], m[1], m[2]) for m in metrics])
+        except (json.JSONDecodeError, IOError, IndexError, TypeError, struct.error) as e:
+            print(f"Error migrating metrics file {legacy_file.name}: {e}")
+        try:
+            legacy_file.unlink()
+        except OSError:
+            pass
+    
     def delete_metrics(self, server_name: str):
         """
         Delete all metrics for a server (when server is removed)
@@ -162,15 +460,56 @@ class MetricsPersistence:
             server_name: Name of the server
         """
         metrics_file = self._get_metrics_file_path(server_name)
-        lock = self._get_lock(server_name)
+        lock = self._get_lock(metrics_file)
+        
+        # Queued data points must not recreate the file afterwards
+        self._wait_for_writer()
         
         try:
             with lock:
                 if metrics_file.exists():
                     metrics_file.unlink()
+                self._append_counts.pop(metrics_file, None)
+                self._cache.pop(metrics_file, None)
+                self._pending.pop(metrics_file, None)
         except Exception as e:
             print(f"Error deleting metrics for {server_name}: {e}")
     
+    def flush(self, server_name: Optional[str] = None):
+        """
+        Write queued and buffered data points to disk
+        
+        Args:
+            server_name: Only flush this server (default: all servers)
+        """
+        if self._writer.is_alive():
+            # The writer thread owns the buffers; (server name, None) asks it to write them
+            self._queue.put((server_name, None))
+            self._wait_for_writer()
+        else:
+            self._write_all_pending(server_name)
+    
+    def _write_all_pending(self, server_name: Optional[str] = None):
+        """Write the buffered data points of one server (default: all servers) to disk"""
+        if server_name is not None:
+            metrics_files = [self._get_metrics_file_path(server_name)]
+        else:
+            metrics_files = list(self._pending.keys())
+        
+        for metrics_file in metrics_files:
+            try:
+                with self._get_lock(metrics_file):
+                    self._write_pending(metrics_file)
+            except Exception as e:
+                print(f"Error writing metrics file {metrics_file.name}: {e}")
+    
+    def close(self):
+        """Stop the writer thread and write all pending data points (on application exit)"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self.flush()
+    
     def cleanup_all_old_data(self, max_age_seconds: Optional[int] = None):
         """
         Cleanup old data for all servers in the metrics directory
@@ -184,9 +523,30 @@ class MetricsPersistence:
         if not self.metrics_dir.exists():
             return
         
-        # Get all JSON files in metrics directory
-        for metrics_file in self.metrics_dir.glob("*.json"):
+        # One directory listing instead of a glob per file type
+        with os.scandir(self.metrics_dir) as entries:
+            file_names = [entry.name for entry in entries if entry.is_file()]
+        
+        # Remove temp files left behind by a crash during a rewrite
+        for file_name in file_names:
+            if file_name.endswith(".bin.tmp"):
+                try:
+                    os.remove(self.metrics_dir / file_name)
+                except OSError:
+                    pass
+        
+        legacy_files = [self.metrics_dir / name for name in file_names if name.endswith(".json")]
+        stems = {name[:-len(".bin")] for name in file_names if name.endswith(".bin")}
+        stems.update(legacy_file.stem for legacy_file in legacy_files)
+        if not stems:
+            return
+        
+        def cleanup(stem: str):
             # Extract server name from filename (reverse of sanitization)
-            server_name = metrics_file.stem.replace('_', ' ')
-            self.cleanup_old_data(server_name, max_age_seconds)
-
+            self.cleanup_old_data(stem.replace('_', ' '), max_age_seconds)
+        
+        # Files are independent (each has its own lock), so rewrite them concurrently
+        with ThreadPoolExecutor(max_workers=min(8, len(stems))) as executor:
+            # Convert files written in the old JSON array format first
+            list(executor.map(self._migrate_legacy_file, legacy_files))
+            list(executor.map(cleanup, stems))
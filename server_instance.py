@@ -3,10 +3,28 @@ import os
 import time
 import psutil
 import re
-from typing import Optional, List, Tuple, Dict
+import threading
+from collections import deque
+from typing import Optional, List, Tuple, Dict, Callable, Deque
 from datetime import datetime
 from PySide6.QtCore import QObject, Signal
-from ui.log_reader import LogReaderThread
+from ui.log_reader import create_log_reader
+
+# Log patterns announcing the port a server listens on, in priority order
+_PORT_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?:listening|running|started|bound).*?(?:on|at).*?port\s+(\d+)',
+    r'(?:listening|running|started|bound).*?port\s+(\d+)',
+    r'http://(?:localhost|127\.0\.0\.1|0\.0\.0\.0|\[::\]):(\d+)',
+    r'https://(?:localhost|127\.0\.0\.1|0\.0\.0\.0|\[::\]):(\d+)',
+    r'(?:localhost|127\.0\.0\.1|0\.0\.0\.0):(\d+)(?:\s|$|/|\?|,)',
+))
+# Every pattern above contains one of these (lowercase) substrings
+_PORT_KEYWORDS = ("port", "http", "localhost", "127.0.0.1", "0.0.0.0")
+# Matches wherever any of the patterns does
+_PORT_ANY_RE = re.compile("|".join(f"(?:{p.pattern})" for p in _PORT_PATTERNS), re.IGNORECASE)
+
+# On Windows, using CREATE_NO_WINDOW hides the console
+_CREATION_FLAGS = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
 
 class ServerInstance(QObject):
     """Represents a single running server instance"""
@@ -16,21 +34,33 @@ class ServerInstance(QObject):
     log_received = Signal(str, bool)  # log_line, is_error
     metrics_updated = Signal(dict)  # metrics_dict
     port_detected = Signal(int)  # port
+    process_exited = Signal(str, int)  # (name, pid), emitted from the exit watcher thread
+    
+    # How long a child process listing is reused by detect_port
+    CHILDREN_CACHE_SECONDS = 2.0
     
-    def __init__(self, name: str, config: Dict, settings: Dict):
+    def __init__(self, name: str, config: Dict, settings: Dict,
+                 log_sink: Optional[Callable[[str, str], None]] = None):
         super().__init__()
         self.name = name
         self.config = config
         self.settings = settings
+        # Called as log_sink(name, line) on the log reader thread for persistence
+        self.log_sink = log_sink
         self.process: Optional[subprocess.Popen] = None
         self.psutil_process: Optional[psutil.Process] = None
-        self.log_reader: Optional[LogReaderThread] = None
-        self.cpu_history: List[float] = []
+        self.log_reader = None  # LogReaderThread or MultiplexedLogReader
+        self.cpu_history: Deque[float] = deque(maxlen=5)  # Sliding window for CPU smoothing
+        self._cpu_sum = 0.0  # Running sum of cpu_history
         self.last_metrics: Dict = {}
+        # time.monotonic() of the last metrics signal (bookkeeping owned by ServerManager)
+        self.last_metrics_emit = float("-inf")
         self.detected_port: Optional[int] = None
+        # (time.monotonic() of the listing, child processes) or None
+        self._children_cache: Optional[Tuple[float, List[psutil.Process]]] = None
         
-    def start(self) -> bool:
-        """Start the server process"""
+    def start(self, popen_factory: Optional[Callable[..., subprocess.Popen]] = None) -> bool:
+        """Start the server process (popen_factory replaces subprocess.Popen, e.g. in tests)"""
         if self.process:
             return False
             
@@ -39,21 +69,19 @@ class ServerInstance(QObject):
             return False
             
         try:
-            cmd = self._build_command()
-            if not cmd:
+            launch = self._get_launch()
+            if not launch:
                 return False
-                
-            cwd = os.path.dirname(server_path) if os.path.isfile(server_path) else server_path
+            cmd, cwd = launch
             
             # Start process
-            # On Windows, using CREATE_NO_WINDOW hides the console.
             # On Unix, we might want setsid to easily kill groups, but psutil handles trees fine.
-            self.process = subprocess.Popen(
+            self.process = (popen_factory or subprocess.Popen)(
                 cmd,
                 cwd=cwd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+                creationflags=_CREATION_FLAGS
             )
             
             # Wrap with psutil immediately to capture the correct PID
@@ -66,9 +94,15 @@ class ServerInstance(QObject):
                 return False
                 
             # Start log reader
-            self.log_reader = LogReaderThread(self.name, self.process, self)
+            self.log_reader = create_log_reader(self.name, self.process, self)
             self.log_reader.start()
             
+            # Get notified when the process exits on its own instead of polling
+            threading.Thread(
+                target=self._watch_exit, args=(self.process,),
+                name=f"ExitWatcher-{self.name}", daemon=True
+            ).start()
+            
             self.config["status"] = "running"
             self.config["started_at"] = datetime.now().isoformat()
             
@@ -80,7 +114,7 @@ class ServerInstance(QObject):
             print(f"Error starting server {self.name}: {e}")
             return False
 
-    # Shim for LogReaderThread
+    # Shim for the log reader
     class _SignalShim:
         def __init__(self, callback):
             self.callback = callback
@@ -92,11 +126,26 @@ class ServerInstance(QObject):
         return self._SignalShim(self._on_log_received)
 
     def _on_log_received(self, line, is_error):
+        # Persist from the reader thread so disk I/O never waits on the GUI thread
+        if self.log_sink:
+            self.log_sink(self.name, line)
         self.log_received.emit(line, is_error)
         # Try to detect port from logs
         if not self.detected_port:
             self._detect_port_from_log(line)
 
+    def has_exited(self) -> bool:
+        """Whether the process has exited, as recorded by the exit watcher (no syscall)"""
+        return self.process is not None and self.process.returncode is not None
+
+    def _watch_exit(self, process: subprocess.Popen):
+        """Block until the process exits, then report its pid (runs on the watcher thread)"""
+        try:
+            process.wait()
+        except Exception:
+            return
+        self.process_exited.emit(self.name, process.pid)
+
     def stop(self) -> bool:
         """Stop the server process and all its subprocesses completely"""
         if not self.process:
@@ -114,53 +163,63 @@ class ServerInstance(QObject):
             self.log_reader = None
 
         # 2. Kill the Process Tree
-        try:
-            # We use the PID to reconstruct the psutil object if self.psutil_process is stale
-            parent = psutil.Process(self.process.pid)
-            children = parent.children(recursive=True)
+        # Skipped once the exit watcher has reaped the process: its pid may already
+        # belong to an unrelated process tree
+        if not self.has_exited():
+            try:
+                # We use the PID to reconstruct the psutil object if self.psutil_process is stale
+                parent = psutil.Process(self.process.pid)
+                children = parent.children(recursive=True)
             
-            # Add parent to list of processes to kill
-            procs = children + [parent]
+                # Add parent to list of processes to kill
+                procs = children + [parent]
             
-            # Send SIGTERM (Polite kill)
-            for p in procs:
-                try:
-                    p.terminate()
-                except psutil.NoSuchProcess:
-                    pass
+                # Send SIGTERM (Polite kill)
+                for p in procs:
+                    try:
+                        p.terminate()
+                    except psutil.NoSuchProcess:
+                        pass
 
-            # Wait for them to die (up to 5 seconds)
-            gone, alive = psutil.wait_procs(procs, timeout=5)
+                # Wait for them to die (up to 5 seconds)
+                gone, alive = psutil.wait_procs(procs, timeout=5)
             
-            # Send SIGKILL (Force kill) to anyone still alive
-            for p in alive:
-                print(f"Force killing process {p.pid} for {self.name}")
-                try:
-                    p.kill()
-                except psutil.NoSuchProcess:
-                    pass
+                # Send SIGKILL (Force kill) to anyone still alive
+                for p in alive:
+                    print(f"Force killing process {p.pid} for {self.name}")
+                    try:
+                        p.kill()
+                    except psutil.NoSuchProcess:
+                        pass
                     
-        except psutil.NoSuchProcess:
-            # Main process already dead
-            pass
-        except Exception as e:
-            print(f"Error during process termination for {self.name}: {e}")
+            except psutil.NoSuchProcess:
+                # Main process already dead
+                pass
+            except Exception as e:
+                print(f"Error during process termination for {self.name}: {e}")
 
         # 3. Cleanup Popen object
-        try:
-            # Wait for the internal Popen object to acknowledge death
-            self.process.wait(timeout=1)
-        except (subprocess.TimeoutExpired, Exception):
-            # If Popen wrapper is still confused, force kill it locally (though psutil likely did it)
+        # psutil normally reaped it already (or the exit watcher did), so a
+        # non-blocking poll is enough; only wait when the exit isn't recorded yet
+        if self.process.poll() is None:
             try:
-                self.process.kill() 
-            except: 
-                pass
+                # Wait for the internal Popen object to acknowledge death
+                self.process.wait(timeout=1)
+            except (subprocess.TimeoutExpired, Exception):
+                # If Popen wrapper is still confused, force kill it locally (though psutil likely did it)
+                try:
+                    self.process.kill() 
+                except: 
+                    pass
         
         # 4. Final Cleanup
         self.process = None
         self.psutil_process = None
+        self._children_cache = None
         self.detected_port = None # Reset detected port
+        # The CPU window and its running sum are only valid together
+        self.cpu_history.clear()
+        self._cpu_sum = 0.0
         
         self.config["status"] = "stopped"
         if "started_at" in self.config:
@@ -169,6 +228,19 @@ class ServerInstance(QObject):
         self.status_changed.emit("stopped")
         return True
 
+    def _get_launch(self) -> Optional[Tuple[List[str], str]]:
+        """Get the command line and working directory
+        
+        Built on every start: both depend on the filesystem (venv interpreter,
+        whether the path is a file), which may change between starts.
+        """
+        cmd = self._build_command()
+        if not cmd:
+            return None
+        server_path = self.config["path"]
+        cwd = os.path.dirname(server_path) if os.path.isfile(server_path) else server_path
+        return cmd, cwd
+
     def _build_command(self) -> Optional[List[str]]:
         """Build the command line arguments based on server type"""
         server_type = self.config.get("server_type", "nodejs")
@@ -222,27 +294,33 @@ class ServerInstance(QObject):
 
     def get_metrics(self) -> Optional[Tuple[float, float]]:
         """Get current metrics (cpu, ram). Returns raw values."""
-        if not self.psutil_process or not self.psutil_process.is_running():
-            if self.process: # Process died unexpectedly
-                self.stop()
+        # An unreaped child keeps its pid, so the Popen returncode is as reliable as
+        # psutil's is_running() here without re-reading the process start time
+        # An exited process is torn down by ServerManager once the exit watcher's
+        # notification arrives; stopping it here would leave the manager unaware
+        if not self.psutil_process or self.has_exited():
             return None
             
         try:
-            # cpu_percent(interval=None) returns float, but can be 0.0 on first call
-            raw_cpu = self.psutil_process.cpu_percent(interval=None)
+            # oneshot() lets cpu_percent and memory_info share a single stat read
+            with self.psutil_process.oneshot():
+                # cpu_percent(interval=None) returns float, but can be 0.0 on first call
+                raw_cpu = self.psutil_process.cpu_percent(interval=None)
+                memory_info = self.psutil_process.memory_info()
             
+            # Update the running sum with the sample the full window is about to drop
+            if len(self.cpu_history) == self.cpu_history.maxlen:
+                self._cpu_sum -= self.cpu_history[0]
             self.cpu_history.append(raw_cpu)
-            if len(self.cpu_history) > 5:
-                self.cpu_history.pop(0)
+            self._cpu_sum += raw_cpu
             
-            smoothed_cpu = sum(self.cpu_history) / len(self.cpu_history)
+            # Clamp float drift of the running sum (e.g. -1e-15 after all-zero samples)
+            smoothed_cpu = max(self._cpu_sum / len(self.cpu_history), 0.0)
             
-            memory_info = self.psutil_process.memory_info()
             memory_mb = memory_info.rss / (1024 * 1024)
             
             return (smoothed_cpu, memory_mb)
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            self.stop()
             return None
 
     def detect_port(self):
@@ -252,15 +330,23 @@ class ServerInstance(QObject):
         if configured_port:
             self._set_detected_port(configured_port)
             return
+        
+        # Already found (e.g. from the logs), skip the expensive connection scan
+        if self.detected_port:
+            return
 
         # 2. Psutil connections
         if self.psutil_process:
             try:
+                # A zombie has no sockets; querying it only fails with permission errors
+                if self.psutil_process.status() == psutil.STATUS_ZOMBIE:
+                    return
+                
                 # Iterate over connections of the main process AND children
                 # Often the main process is a wrapper (e.g. npm) and the child binds the port
                 processes_to_check = [self.psutil_process]
                 try:
-                    processes_to_check.extend(self.psutil_process.children(recursive=True))
+                    processes_to_check.extend(self._get_children())
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     pass
 
@@ -277,26 +363,35 @@ class ServerInstance(QObject):
             except:
                 pass
 
+    def _get_children(self) -> List[psutil.Process]:
+        """Get the process's descendants, reusing a listing younger than CHILDREN_CACHE_SECONDS"""
+        now = time.monotonic()
+        cached = self._children_cache
+        if cached is not None and now - cached[0] < self.CHILDREN_CACHE_SECONDS:
+            return cached[1]
+        # Walking the process table is expensive, server process trees rarely change
+        children = self.psutil_process.children(recursive=True)
+        self._children_cache = (now, children)
+        return children
+
     def _detect_port_from_log(self, line: str):
         """Parse log line for port"""
-        port_patterns = [
-            r'(?:listening|running|started|bound).*?(?:on|at).*?port\s+(\d+)',
-            r'(?:listening|running|started|bound).*?port\s+(\d+)',
-            r'http://(?:localhost|127\.0\.0\.1|0\.0\.0\.0|\[::\]):(\d+)',
-            r'https://(?:localhost|127\.0\.0\.1|0\.0\.0\.0|\[::\]):(\d+)',
-            r'(?:localhost|127\.0\.0\.1|0\.0\.0\.0):(\d+)(?:\s|$|/|\?|,)',
-        ]
+        # Cheap substring test first; most log lines never mention a port or URL
+        lowered = line.lower()
+        if not any(keyword in lowered for keyword in _PORT_KEYWORDS):
+            return
+        if not _PORT_ANY_RE.search(line):
+            return
         
-        for pattern in port_patterns:
-            match = re.search(pattern, line, re.IGNORECASE)
-            if match:
-                try:
-                    port = int(match.group(1))
-                    if 1024 <= port <= 65535:
-                        self._set_detected_port(port)
-                        return
-                except:
-                    continue
+        # Some pattern matches; keep the pattern priority when picking the port
+        for pattern in _PORT_PATTERNS:
+            match = pattern.search(line)
+            # At most 5 digits: a longer run is no port, and int() raises past 4300 digits
+            if match and len(match.group(1)) <= 5:
+                port = int(match.group(1))
+                if 1024 <= port <= 65535:
+                    self._set_detected_port(port)
+                    return
 
     def _set_detected_port(self, port: int):
         if self.detected_port != port:
@@ -2,13 +2,64 @@
 Server Manager - Handles Node.js and Flask server process management
 Refactored to use ConfigManager and ServerInstance
 """
+import threading
 import time
-from typing import Dict, Optional, List, Tuple
-from PySide6.QtCore import QObject, Signal
+from bisect import bisect_left
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Collection, Dict, Optional, List, Tuple
+from PySide6.QtCore import QObject, Signal, QTimer, SIGNAL
 from config_manager import ConfigManager
 from server_instance import ServerInstance
 from log_persistence import LogPersistence
-from metrics_persistence import MetricsPersistence
+from metrics_persistence import MetricsPersistence, MetricSeries
+
+# Signature of ServerManager.server_log, for counting its receivers
+_SERVER_LOG_SIGNAL = SIGNAL("server_log(QString,QString,bool)")
+
+
+def _merge_history(persisted: list, recent) -> list:
+    """Merge two time-ordered histories in one pass, preferring recent entries on equal timestamps"""
+    if not recent:
+        return persisted
+    if not persisted:
+        return list(recent)
+    
+    merged = []
+    append = merged.append
+    recent_iter = iter(recent)
+    pending = next(recent_iter)
+    for item in persisted:
+        while pending is not None and pending[0] < item[0]:
+            append(pending)
+            pending = next(recent_iter, None)
+        if pending is not None and pending[0] == item[0]:
+            continue  # Same sample, the recent copy is emitted instead
+        append(item)
+    if pending is not None:
+        append(pending)
+        merged.extend(recent_iter)
+    return merged
+
+
+def _downsample(points, bucket_seconds: float) -> List[Tuple[float, float, float]]:
+    """Average time-ordered (timestamp, cpu, ram) points per bucket, timestamped at the bucket start"""
+    result = []
+    bucket = None
+    cpu_sum = ram_sum = 0.0
+    count = 0
+    for timestamp, cpu, ram in points:
+        start = timestamp - timestamp % bucket_seconds
+        if start != bucket:
+            if count:
+                result.append((bucket, cpu_sum / count, ram_sum / count))
+            bucket, cpu_sum, ram_sum, count = start, 0.0, 0.0, 0
+        cpu_sum += cpu
+        ram_sum += ram
+        count += 1
+    if count:
+        result.append((bucket, cpu_sum / count, ram_sum / count))
+    return result
 
 class ServerManager(QObject):
     """Manages Node.js and Flask server processes"""
@@ -19,34 +70,80 @@ class ServerManager(QObject):
     server_started = Signal(str)  # server_name
     server_stopped = Signal(str)  # server_name
     server_log = Signal(str, str, bool)  # (server_name, log_line, is_error)
+    server_log_batch = Signal(str, list)  # (server_name, [(log_line, is_error), ...])
     port_detected = Signal(str, int)  # (server_name, port)
+    metrics_recorded = Signal()  # New history samples, once per MetricsMonitor pass
     
     # Stack Signals
     stack_added = Signal()
     stack_removed = Signal()
     stack_updated = Signal()
     
-    def __init__(self, config_file: str = "servers.json", settings_file: str = "settings.json"):
+    # Delay before a log-triggered port detection runs (batches chatty output)
+    DETECT_PORT_DELAY_MS = 200
+    # Delay over which log lines are collected into one server_log_batch signal
+    LOG_BATCH_DELAY_MS = 50
+    # Samples buffered per server before they are handed to persistence as one batch
+    METRICS_BATCH_SIZE = 30
+    METRICS_BATCH_MAX_AGE = 5.0  # Seconds a buffered sample may wait
+    # In-memory history per server: one hour, bounded to one sample per second
+    METRICS_HISTORY_SECONDS = 3600
+    # Samples (or seconds) the history may run over before it is trimmed in one go
+    HISTORY_TRIM_SLACK = 60
+    # Per-minute averages serve graph ranges longer than the in-memory hour (24 hours kept)
+    MINUTE_HISTORY_SECONDS = 86400
+    # Minimum time between server_metrics_changed signals for one server
+    METRICS_EMIT_INTERVAL = 0.5
+    
+    def __init__(self, config_file: str = "servers.json", settings_file: str = "settings.json",
+                 stacks_file: str = "stacks.json", logs_dir: str = "logs",
+                 metrics_dir: str = "metrics"):
         super().__init__()
-        self.config_manager = ConfigManager(config_file, settings_file)
+        self.config_manager = ConfigManager(config_file, settings_file, stacks_file)
         self.instances: Dict[str, ServerInstance] = {}
         
-        self.log_persistence = LogPersistence()
-        self.metrics_persistence = MetricsPersistence()
-        self.metrics_history: Dict[str, List[Tuple[float, float, float]]] = {}
-        self.last_cleanup_time: Dict[str, float] = {}
+        self.log_persistence = LogPersistence(logs_dir)
+        self.metrics_persistence = MetricsPersistence(metrics_dir)
+        self.metrics_history: Dict[str, MetricSeries] = {}  # Column arrays, 24 bytes per sample
+        self.minute_history: Dict[str, MetricSeries] = {}  # Completed per-minute averages
+        self._minute_buckets: Dict[str, List[float]] = {}  # Open minute: [start, cpu sum, ram sum, count]
+        # Guards the three above: the monitor thread records into them while graphs read them
+        self._history_lock = threading.Lock()
+        self._minute_seeded = set()  # Servers whose minute history includes the data on disk
+        self._pending_metrics: Dict[str, List[Tuple[float, float, float]]] = {}  # Not yet persisted
+        # Guards _pending_metrics: the monitor thread buffers into it while the GUI thread flushes
+        self._pending_lock = threading.Lock()
+        self._metrics_version = 0  # Bumped whenever a server's metrics history changes
+        # (server name, time range) -> (metrics version, server count, get_metrics_history result)
+        self._history_results: Dict[Tuple[Optional[str], Optional[float]], Tuple[int, int, dict]] = {}
         
         # Expose properties for backward compatibility/UI access
         self.settings = self.config_manager.settings
         self.servers = self.config_manager.servers
         self.psutil_processes = {} # Shim for UI access if needed, but better to remove dependency
         self.detected_ports = {} # Shim
+        self._detect_pending = set()  # Servers with a log-triggered detection scheduled
+        self._log_batches: Dict[str, List[Tuple[str, bool]]] = {}  # Lines awaiting server_log_batch
         
         # Cleanup old data on startup
         self.metrics_persistence.cleanup_all_old_data()
     
     def save_settings(self):
         self.config_manager.save_settings()
+
+    def flush(self):
+        """Write any pending configuration changes, buffered logs and metrics to disk"""
+        self.config_manager.flush()
+        self.log_persistence.flush()
+        self.flush_pending_metrics()
+        self.metrics_persistence.flush()
+    
+    def close(self):
+        """Flush pending data and release open log files (on application exit)"""
+        self.config_manager.flush()
+        self.flush_pending_metrics()
+        self.metrics_persistence.close()
+        self.log_persistence.close()
         
     def load_settings(self):
         self.config_manager.load_settings()
@@ -63,11 +160,11 @@ class ServerManager(QObject):
         return metrics
 
     def record_server_metrics(self, name: str):
-        """Record metrics for a specific server (called by MetricsMonitor)"""
-        if name not in self.instances:
+        """Record metrics for a specific server to history, without notifying"""
+        instance = self.instances.get(name)
+        if instance is None:
             return
             
-        instance = self.instances[name]
         raw_metrics = instance.get_metrics()
         
         if raw_metrics:
@@ -82,7 +179,20 @@ class ServerManager(QObject):
             self.stop_server(name)
         
         if self.config_manager.remove_server(name):
+            # Deletion is written through right away, like the log and metrics files
+            self.config_manager.flush()
             self.log_persistence.delete_logs(name)
+            with self._pending_lock:
+                self._pending_metrics.pop(name, None)
+            self._metrics_version += 1
+            # Memoized results are keyed by server; drop the removed server's ranges
+            for key in [key for key in self._history_results if key[0] == name]:
+                del self._history_results[key]
+            with self._history_lock:
+                self.metrics_history.pop(name, None)
+                self.minute_history.pop(name, None)
+                self._minute_buckets.pop(name, None)
+            self._minute_seeded.discard(name)
             self.metrics_persistence.delete_metrics(name)
             return True
         return False
@@ -90,7 +200,7 @@ class ServerManager(QObject):
     def update_server(self, *args, **kwargs):
         return self.config_manager.update_server(*args, **kwargs)
     
-    def start_server(self, name: str) -> bool:
+    def start_server(self, name: str, popen_factory: Optional[Callable] = None) -> bool:
         if name not in self.servers:
             return False
         
@@ -98,14 +208,17 @@ class ServerManager(QObject):
             if self.instances[name].process:
                 return False # Already running
         
-        instance = ServerInstance(name, self.servers[name], self.settings)
+        instance = ServerInstance(name, self.servers[name], self.settings,
+                                  log_sink=self.log_persistence.append_log)
         
-        # Connect signals
-        instance.status_changed.connect(lambda s: self._on_status_changed(name, s))
-        instance.log_received.connect(lambda l, e: self._on_log_received(name, l, e))
-        instance.port_detected.connect(lambda p: self._on_port_detected(name, p))
+        # Connect signals (partials bind the server name without a Python-level closure frame)
+        instance.status_changed.connect(partial(self._on_status_changed, name))
+        instance.log_received.connect(partial(self._on_log_received, name))
+        instance.port_detected.connect(partial(self._on_port_detected, name))
+        # Bound slot, so the exit notification is queued onto this object's thread
+        instance.process_exited.connect(self._on_process_exited)
         
-        if instance.start():
+        if instance.start(popen_factory):
             self.instances[name] = instance
             # Shim for psutil_processes
             if instance.psutil_process:
@@ -123,6 +236,9 @@ class ServerManager(QObject):
                 del self.instances[name]
                 if name in self.psutil_processes:
                     del self.psutil_processes[name]
+                self.flush_pending_metrics(name)
+                self.metrics_persistence.flush(name)
+                self.log_persistence.release(name)
                 self.server_stopped.emit(name)
                 return True
         return False
@@ -138,27 +254,60 @@ class ServerManager(QObject):
         return self.start_server(name)
     
     def get_server_status(self, name: str) -> str:
-        if name in self.instances:
-            # Check if process is still alive
-            instance = self.instances[name]
-            if instance.process and instance.process.poll() is not None:
-                # Died
+        instance = self.instances.get(name)
+        if instance is not None:
+            # Check if process is still alive. The exit watcher thread is blocked in
+            # wait() and sets returncode when it exits, so no poll() syscall is needed
+            if instance.process is None or instance.has_exited():
+                # Died (or was stopped without the manager's cleanup)
                 self.stop_server(name)
                 return "stopped"
             return "running"
         return self.servers.get(name, {}).get("status", "stopped")
     
+    def sample_all_metrics(self, record: Collection[str] = ()) -> Dict[str, Dict]:
+        """Take one metrics reading for every running server (called by MetricsMonitor)
+        
+        Readings of the servers named in record are also recorded to history, and
+        metrics_recorded is emitted once for the pass. Returns the metrics that
+        were emitted as server_metrics_changed.
+        """
+        changed = {}
+        recorded = False
+        for name in list(self.instances):
+            due = name in record
+            metrics = self.update_server_metrics(name, record=due)
+            if metrics:
+                changed[name] = metrics
+            recorded = recorded or due
+        if recorded:
+            self.metrics_recorded.emit()
+        return changed
+    
+    def get_all_statuses(self) -> Dict[str, str]:
+        """Get the status of every configured server in one pass"""
+        return {name: self.get_server_status(name) for name in list(self.servers)}
+    
     def get_server_metrics(self, name: str) -> Optional[Dict]:
-        if name not in self.instances:
+        """Read current metrics, emitting server_metrics_changed if they changed"""
+        return self.update_server_metrics(name, record=False)
+
+    def update_server_metrics(self, name: str, record: bool = False) -> Optional[Dict]:
+        """Take one reading for a server (called by MetricsMonitor every tick)
+        
+        The reading is recorded to history when record is set, and emitted as
+        server_metrics_changed when it changed, so a tick costs one process read.
+        """
+        instance = self.instances.get(name)
+        if instance is None:
             return None
             
-        instance = self.instances[name]
         raw_metrics = instance.get_metrics()
         
         if raw_metrics:
             cpu, ram = raw_metrics
-            # Record metrics logic (simplified from original)
-            self._record_metrics(name, cpu, ram)
+            if record:
+                self._record_metrics(name, cpu, ram)
             
             # Check if changed significantly (logic from original)
             last = instance.last_metrics
@@ -166,6 +315,13 @@ class ServerManager(QObject):
                 abs(cpu - last.get("cpu_percent", 0)) >= 0.1 or 
                 abs(ram - last.get("memory_mb", 0)) >= 1.0):
                 
+                # Rate-limit the signal; last_metrics keeps the last emitted value, so a
+                # suppressed change is still seen as a change (with fresher numbers) next poll
+                now = time.monotonic()
+                if now - instance.last_metrics_emit < self.METRICS_EMIT_INTERVAL:
+                    return None
+                instance.last_metrics_emit = now
+                
                 metrics = {"cpu_percent": cpu, "memory_mb": ram}
                 instance.last_metrics = metrics
                 self.server_metrics_changed.emit(name, metrics)
@@ -174,32 +330,113 @@ class ServerManager(QObject):
         return None
 
     def _record_metrics(self, name, cpu, ram):
-        current_time = time.time()
-        self.metrics_persistence.append_metric(name, current_time, cpu, ram)
+        # Millisecond timestamps, as persisted, so disk and memory entries merge by equality
+        current_time = round(time.time() * 1000) / 1000
+        sample = (current_time, cpu, ram)
         
-        if name not in self.metrics_history:
-            self.metrics_history[name] = []
+        # Hand samples to persistence in batches rather than one queue item per second
+        with self._pending_lock:
+            pending = self._pending_metrics.setdefault(name, [])
+            pending.append(sample)
+            if (len(pending) >= self.METRICS_BATCH_SIZE
+                    or current_time - pending[0][0] >= self.METRICS_BATCH_MAX_AGE):
+                self._flush_pending_locked(name)
         
-        self.metrics_history[name].append((current_time, cpu, ram))
-        
-        # Prune memory history (1 hour)
-        cutoff = current_time - 3600
-        self.metrics_history[name] = [x for x in self.metrics_history[name] if x[0] >= cutoff]
+        with self._history_lock:
+            history = self.metrics_history.get(name)
+            if history is None:
+                history = self.metrics_history[name] = MetricSeries()
+            history.append(current_time, cpu, ram)
+            
+            # Prune memory history to 1 hour, keeping at most one sample per second of it.
+            # Trimming shifts the arrays, so it waits until a slack's worth is due; range
+            # queries find their start by timestamp and never see the extra samples
+            cutoff = current_time - self.METRICS_HISTORY_SECONDS
+            excess = len(history) - self.METRICS_HISTORY_SECONDS
+            if excess >= self.HISTORY_TRIM_SLACK or history.timestamps[0] < cutoff - self.HISTORY_TRIM_SLACK:
+                if excess > 0:
+                    cutoff = max(cutoff, history.timestamps[excess])
+                history.trim_before(cutoff)
+            
+            self._add_to_minute(name, current_time, cpu, ram)
+        self._metrics_version += 1
+
+    def _add_to_minute(self, name: str, timestamp: float, cpu: float, ram: float):
+        """Accumulate a sample into its minute, storing the average once the minute is over (lock held)"""
+        start = timestamp - timestamp % 60
+        bucket = self._minute_buckets.get(name)
+        if bucket is None or bucket[0] != start:
+            if bucket is not None:
+                minutes = self.minute_history.get(name)
+                if minutes is None:
+                    minutes = self.minute_history[name] = MetricSeries()
+                minutes.append(bucket[0], bucket[1] / bucket[3], bucket[2] / bucket[3])
+                minutes.trim_before(start - self.MINUTE_HISTORY_SECONDS)
+            bucket = self._minute_buckets[name] = [start, 0.0, 0.0, 0]
+        bucket[1] += cpu
+        bucket[2] += ram
+        bucket[3] += 1
+
+    def _get_minute_points(self, name: str, start_time: float) -> List[Tuple[float, float, float]]:
+        """Per-minute averages since start_time, including the minute in progress"""
+        if name not in self._minute_seeded:
+            # First long-range query: fill in the minutes recorded before this session.
+            # The disk read happens outside the lock; the minutes recorded meanwhile are
+            # taken from the live series when the seeded one is swapped in
+            self._minute_seeded.add(name)
+            persisted = self.metrics_persistence.load_metrics(
+                name, start_time=time.time() - self.MINUTE_HISTORY_SECONDS)
+            with self._history_lock:
+                recorded = self.minute_history.get(name)
+                bucket = self._minute_buckets.get(name)
+                first = recorded.timestamps[0] if recorded else (bucket[0] if bucket else float("inf"))
+                seeded = MetricSeries()
+                seeded.extend(_downsample(persisted[:bisect_left(persisted, (first,))], 60))
+                if recorded:
+                    seeded.extend(recorded.points())
+                self.minute_history[name] = seeded
         
-        # Cleanup persistence (every 5 mins)
-        if name not in self.last_cleanup_time or (current_time - self.last_cleanup_time[name]) >= 300:
-            self.metrics_persistence.cleanup_old_data(name)
-            self.last_cleanup_time[name] = current_time
+        with self._history_lock:
+            minutes = self.minute_history.get(name)
+            points = minutes.points(start_time) if minutes else []
+            bucket = self._minute_buckets.get(name)
+            if bucket is not None and bucket[0] >= start_time:
+                points.append((bucket[0], bucket[1] / bucket[3], bucket[2] / bucket[3]))
+        return points
+
+    def flush_pending_metrics(self, name: Optional[str] = None):
+        """Pass buffered samples of one server (default: all servers) to metrics persistence"""
+        with self._pending_lock:
+            names = [name] if name is not None else list(self._pending_metrics.keys())
+            for server_name in names:
+                self._flush_pending_locked(server_name)
+
+    def _flush_pending_locked(self, name: str):
+        """Pass one server's buffered samples to metrics persistence (_pending_lock held)"""
+        # Handing off under the lock keeps batches in time order when the monitor and GUI
+        # threads flush the same server; it is a put on an unbounded queue and never blocks
+        pending = self._pending_metrics.pop(name, None)
+        if pending:
+            self.metrics_persistence.append_metrics_batch(name, pending)
 
     def get_all_servers(self) -> Dict:
-        # Update status check
-        for name in list(self.instances.keys()):
-            self.get_server_status(name)
+        # Dead processes are reported by each instance's exit watcher, no polling needed
         return self.servers
         
     def stop_all_servers(self):
-        for name in list(self.instances.keys()):
-            self.stop_server(name)
+        names = list(self.instances.keys())
+        if len(names) <= 1:
+            for name in names:
+                self.stop_server(name)
+            return
+        
+        # Stop process trees concurrently so shutdown waits for the slowest server, not the sum
+        with ThreadPoolExecutor(max_workers=min(32, len(names))) as executor:
+            list(executor.map(self.stop_server, names))
+        
+        # Status signals from the worker threads are queued to this thread and may
+        # never be delivered on quit, so persist the "stopped" statuses directly
+        self.config_manager.mark_dirty("servers")
 
     def save_log(self, server_name: str, log_line: str):
         self.log_persistence.append_log(server_name, log_line)
@@ -211,30 +448,46 @@ class ServerManager(QObject):
         self.log_persistence.clear_logs(server_name)
 
     def get_metrics_history(self, server_name: Optional[str] = None, time_range_seconds: Optional[float] = None):
+        # Nothing was recorded or removed since the last call for this range: return
+        # the same result object, so callers can skip re-aggregating it
+        key = (server_name, time_range_seconds)
+        version = self._metrics_version
+        previous = self._history_results.get(key)
+        if previous is not None and previous[0] == version and previous[1] == len(self.servers):
+            return previous[2]
+        result = self._build_metrics_history(server_name, time_range_seconds)
+        self._history_results[key] = (version, len(self.servers), result)
+        return result
+    
+    def _build_metrics_history(self, server_name: Optional[str], time_range_seconds: Optional[float]):
         # Re-implement logic using self.metrics_history and persistence
         # This is largely same as before, just using self.metrics_history which we populate in _record_metrics
         current_time = time.time()
         start_time = current_time - time_range_seconds if time_range_seconds else None
         
         result = {}
-        names = [server_name] if server_name else list(self.servers.keys())
+        # Read-only loop, so the servers dict is iterated directly instead of copying its keys
+        names = (server_name,) if server_name else self.servers
+        get_in_memory = self.metrics_history.get
         
         for name in names:
-            in_memory = self.metrics_history.get(name, [])
+            in_memory = get_in_memory(name)
             
-            if time_range_seconds is None or time_range_seconds > 3600:
+            if time_range_seconds is not None and time_range_seconds > self.METRICS_HISTORY_SECONDS:
+                # Hours of data are plotted from per-minute averages, not every raw sample
+                result[name] = self._get_minute_points(name, start_time)
+            elif time_range_seconds is None:
+                # The full history needs the disk; get_metrics_history reuses the result
+                # until a new sample is recorded
                 persisted = self.metrics_persistence.load_metrics(name, start_time=start_time)
-                # Merge
-                data_map = {ts: (ts, c, r) for ts, c, r in persisted}
-                for item in in_memory:
-                    data_map[item[0]] = item
-                
-                result[name] = sorted(data_map.values())
+                with self._history_lock:
+                    recent = in_memory.points() if in_memory else []
+                # Both sides are already in time order
+                result[name] = _merge_history(persisted, recent)
             else:
-                if start_time:
-                    result[name] = [x for x in in_memory if x[0] >= start_time]
-                else:
-                    result[name] = in_memory
+                # The series finds the start of the range by binary search
+                with self._history_lock:
+                    result[name] = in_memory.points(start_time) if in_memory else []
                     
         return result if not server_name else {server_name: result.get(server_name, [])}
 
@@ -242,8 +495,23 @@ class ServerManager(QObject):
         return self.detected_ports.get(name)
         
     def detect_port(self, name: str):
-        if name in self.instances:
-            self.instances[name].detect_port()
+        if name in self._detect_pending:
+            return  # A scheduled detection will run shortly
+        instance = self.instances.get(name)
+        if instance is not None:
+            instance.detect_port()
+
+    def schedule_port_detection(self, name: str):
+        """Detect the port once after a short delay, however many log lines arrive meanwhile"""
+        if name in self._detect_pending:
+            return
+        self._detect_pending.add(name)
+        QTimer.singleShot(self.DETECT_PORT_DELAY_MS, partial(self._run_detect, name))
+
+    def _run_detect(self, name: str):
+        self._detect_pending.discard(name)
+        if self.detected_ports.get(name) is None:
+            self.detect_port(name)
 
     # Stack Management
     
@@ -316,11 +584,31 @@ class ServerManager(QObject):
     # Signal handlers
     def _on_status_changed(self, name, status):
         self.servers[name]["status"] = status
-        self.config_manager.save_config()
+        # Status flips come in bursts (stacks, restarts), so coalesce the writes
+        self.config_manager.mark_dirty("servers")
         self.server_status_changed.emit(name, status)
         
+    def _on_process_exited(self, name, pid):
+        # Ignore notifications for processes that were already stopped or replaced. An
+        # instance without a process was stopped outside stop_server and still needs
+        # the manager's cleanup
+        instance = self.instances.get(name)
+        if instance and (instance.process is None or instance.process.pid == pid):
+            self.stop_server(name)
+        
     def _on_log_received(self, name, line, is_error):
-        self.server_log.emit(name, line, is_error)
+        # The UI uses server_log_batch; only pay for the per-line signal when it has a receiver
+        if self.receivers(_SERVER_LOG_SIGNAL):
+            self.server_log.emit(name, line, is_error)
+        # Chatty servers produce hundreds of lines per second; hand them to the UI in batches
+        if not self._log_batches:
+            QTimer.singleShot(self.LOG_BATCH_DELAY_MS, self._emit_log_batches)
+        self._log_batches.setdefault(name, []).append((line, is_error))
+        
+    def _emit_log_batches(self):
+        batches, self._log_batches = self._log_batches, {}
+        for name, lines in batches.items():
+            self.server_log_batch.emit(name, lines)
         
     def _on_port_detected(self, name, port):
         self.detected_ports[name] = port
@@ -0,0 +1,96 @@
+"""
+Test doubles for the process layer
+
+PopenStub stands in for subprocess.Popen (pass it as popen_factory to
+ServerManager.start_server) and ProcessStub for psutil.Process, so tests can
+start and stop servers without spawning anything. conftest.py installs
+ProcessStub for the whole test session.
+"""
+import io
+import itertools
+import subprocess
+import threading
+from collections import namedtuple
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+_MemoryInfo = namedtuple("_MemoryInfo", ["rss", "vms"])
+
+
+class PopenStub:
+    """A process that runs until it is terminated or killed"""
+
+    _pids = itertools.count(12345)
+    running: Dict[int, "PopenStub"] = {}  # pid -> stub, for ProcessStub
+
+    def __init__(self, args, cwd=None, stdout=None, stderr=None, creationflags=0):
+        self.args = args
+        self.cwd = cwd
+        self.pid = next(self._pids)
+        self.returncode: Optional[int] = None
+        self.stdout = io.BytesIO(b"")
+        self.stderr = io.BytesIO(b"")
+        self._exited = threading.Event()
+        self.running[self.pid] = self
+
+    def poll(self) -> Optional[int]:
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if not self._exited.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def _exit(self, returncode: int):
+        if self.returncode is None:
+            self.returncode = returncode
+            self.running.pop(self.pid, None)
+            self._exited.set()
+
+    def terminate(self):
+        self._exit(-15)
+
+    def kill(self):
+        self._exit(-9)
+
+
+class ProcessStub:
+    """psutil.Process for a PopenStub, reporting an idle process without children"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self._popen = PopenStub.running.get(pid)
+
+    def oneshot(self):
+        return nullcontext()
+
+    def is_running(self) -> bool:
+        return self._popen is not None and self._popen.returncode is None
+
+    def status(self) -> str:
+        return "running" if self.is_running() else "zombie"
+
+    def cpu_percent(self, interval: Optional[float] = None) -> float:
+        return 0.0
+
+    def memory_info(self) -> _MemoryInfo:
+        return _MemoryInfo(rss=0, vms=0)
+
+    def children(self, recursive: bool = False) -> List["ProcessStub"]:
+        return []
+
+    def connections(self, kind: str = "inet") -> list:
+        return []
+
+    def terminate(self):
+        if self._popen:
+            self._popen.terminate()
+
+    def kill(self):
+        if self._popen:
+            self._popen.kill()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[int]:
+        if self._popen:
+            return self._popen.wait(timeout)
+        return None
@@ -1,25 +1,34 @@
 import unittest
-from unittest.mock import MagicMock, patch
 import os
-import shutil
 import json
+import pytest
 from server_manager import ServerManager
+from stubs import PopenStub
 
 class TestFlareSolverr(unittest.TestCase):
+    @pytest.fixture(scope="class", autouse=True)
+    @classmethod
+    def _class_manager(cls, tmp_path_factory):
+        # One manager for the class, the tests only touch its in-memory state
+        config_dir = tmp_path_factory.mktemp("flaresolverr")
+        cls.manager = ServerManager(config_file=str(config_dir / "servers.json"),
+                                    settings_file=str(config_dir / "settings.json"),
+                                    stacks_file=str(config_dir / "stacks.json"),
+                                    logs_dir=str(config_dir / "logs"),
+                                    metrics_dir=str(config_dir / "metrics"))
+        yield
+        cls.manager.flush()
+    
+    @pytest.fixture(autouse=True)
+    def _use_tmp_path(self, tmp_path):
+        # Per-test directory for the server files, created and cleaned up by pytest
+        self.test_dir = str(tmp_path)
+    
     def setUp(self):
-        self.test_dir = "test_data"
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
-        os.makedirs(self.test_dir)
-        
-        self.config_file = os.path.join(self.test_dir, "servers.json")
-        self.settings_file = os.path.join(self.test_dir, "settings.json")
-        
-        self.manager = ServerManager(config_file=self.config_file, settings_file=self.settings_file)
-        
-    def tearDown(self):
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
+        # Reset what the previous test changed instead of building a new manager
+        for name in list(self.manager.instances):
+            self.manager.stop_server(name)
+        self.manager.servers.clear()
 
     def test_add_flaresolverr_source(self):
         name = "FlareSource"
@@ -45,22 +54,13 @@ class TestFlareSolverr(unittest.TestCase):
         self.assertEqual(server["python_command"], "python")
         
         # Test start command construction
-        with patch("subprocess.Popen") as mock_popen, \
-             patch("psutil.Process") as mock_psutil, \
-             patch("ui.log_reader.LogReaderThread") as mock_log_reader:
-            
-            mock_process = MagicMock()
-            mock_process.pid = 12345
-            mock_popen.return_value = mock_process
-            
-            self.manager.start_server(name)
-            
-            # Verify command
-            args, kwargs = mock_popen.call_args
-            cmd = args[0]
-            expected_script = os.path.join(path, "src", "flaresolverr.py")
-            self.assertEqual(cmd, ["python", expected_script])
-            self.assertEqual(kwargs["cwd"], path)
+        self.assertTrue(self.manager.start_server(name, popen_factory=PopenStub))
+        
+        # Verify command
+        process = self.manager.instances[name].process
+        expected_script = os.path.join(path, "src", "flaresolverr.py")
+        self.assertEqual(process.args, ["python", expected_script])
+        self.assertEqual(process.cwd, path)
 
     def test_add_flaresolverr_binary(self):
         name = "FlareBinary"
@@ -82,22 +82,13 @@ class TestFlareSolverr(unittest.TestCase):
         self.assertEqual(server["flaresolverr_type"], "binary")
         
         # Test start command construction
-        with patch("subprocess.Popen") as mock_popen, \
-             patch("psutil.Process") as mock_psutil, \
-             patch("ui.log_reader.LogReaderThread") as mock_log_reader:
-            
-            mock_process = MagicMock()
-            mock_process.pid = 12345
-            mock_popen.return_value = mock_process
-            
-            self.manager.start_server(name)
-            
-            # Verify command
-            args, kwargs = mock_popen.call_args
-            cmd = args[0]
-            self.assertEqual(cmd, [path])
-            # CWD should be dir of executable
-            self.assertEqual(kwargs["cwd"], self.test_dir)
+        self.assertTrue(self.manager.start_server(name, popen_factory=PopenStub))
+        
+        # Verify command
+        process = self.manager.instances[name].process
+        self.assertEqual(process.args, [path])
+        # CWD should be dir of executable
+        self.assertEqual(process.cwd, self.test_dir)
 
 if __name__ == "__main__":
     unittest.main()
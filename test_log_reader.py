@@ -0,0 +1,75 @@
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from ui.log_reader import _UNREGISTER_TIMEOUT, create_log_reader
+
+
+class _LogSink:
+    """Stands in for the server_log signal, collecting (name, line, is_error) emits"""
+
+    def __init__(self):
+        self.server_log = self
+        self.lines = []
+        self._changed = threading.Condition()
+
+    def emit(self, name, line, is_error):
+        with self._changed:
+            self.lines.append((name, line, is_error))
+            self._changed.notify_all()
+
+    def wait_for(self, count, timeout=5.0):
+        with self._changed:
+            return self._changed.wait_for(lambda: len(self.lines) >= count, timeout)
+
+
+@unittest.skipIf(sys.platform == 'win32', "pipes are multiplexed on Unix only")
+class TestMultiplexedLogReader(unittest.TestCase):
+    """Reads a real child process through the shared multiplexer thread"""
+
+    def _spawn(self, code):
+        process = subprocess.Popen([sys.executable, "-c", code],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+        return process
+
+    def test_lines_arrive_with_error_flag(self):
+        process = self._spawn(
+            "import sys\n"
+            "print('out 1', flush=True)\n"
+            "print('err 1', file=sys.stderr, flush=True)\n"
+            "sys.stdout.write('out tail')\n"
+        )
+        sink = _LogSink()
+        reader = create_log_reader("Srv", process, sink)
+        reader.start()
+        self.addCleanup(reader.stop)
+
+        process.wait(5)
+        self.assertTrue(sink.wait_for(3))
+        # Order across the two pipes isn't defined, only within each one
+        self.assertCountEqual(sink.lines, [
+            ("Srv", "out 1", False),
+            ("Srv", "err 1", True),
+            ("Srv", "out tail", False),  # Unterminated, delivered at EOF
+        ])
+
+    def test_unregister_closes_pipes(self):
+        process = self._spawn("import time\nprint('up', flush=True)\ntime.sleep(30)\n")
+        sink = _LogSink()
+        reader = create_log_reader("Srv", process, sink)
+        reader.start()
+        self.assertTrue(sink.wait_for(1))
+
+        started = time.monotonic()
+        reader.stop()
+        self.assertLess(time.monotonic() - started, _UNREGISTER_TIMEOUT)
+        self.assertTrue(process.stdout.closed)
+        self.assertTrue(process.stderr.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,32 +1,38 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import os
-import shutil
 import json
 import time
+import pytest
 from server_manager import ServerManager
 from config_manager import ConfigManager
 from server_instance import ServerInstance
+from stubs import PopenStub
 
 class TestRefactoredServerManager(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def _use_tmp_path(self, tmp_path):
+        # Per-test directory, created and cleaned up by pytest
+        self.test_dir = str(tmp_path)
+    
     def setUp(self):
-        self.test_dir = "test_data_refactor"
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
-        os.makedirs(self.test_dir)
-        
         self.config_file = os.path.join(self.test_dir, "servers.json")
         self.settings_file = os.path.join(self.test_dir, "settings.json")
+        self.stacks_file = os.path.join(self.test_dir, "stacks.json")
         
         # Create dummy settings
         with open(self.settings_file, 'w') as f:
             json.dump({"python_command": "python"}, f)
             
-        self.manager = ServerManager(config_file=self.config_file, settings_file=self.settings_file)
+        self.manager = ServerManager(config_file=self.config_file, settings_file=self.settings_file,
+                                     stacks_file=self.stacks_file,
+                                     logs_dir=os.path.join(self.test_dir, "logs"),
+                                     metrics_dir=os.path.join(self.test_dir, "metrics"))
         
     def tearDown(self):
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
+        # Stop stub processes and write pending saves before the directory disappears
+        self.manager.stop_all_servers()
+        self.manager.flush()
 
     def test_config_manager_integration(self):
         """Test that ServerManager correctly delegates to ConfigManager"""
@@ -52,6 +58,35 @@ class TestRefactoredServerManager(unittest.TestCase):
         self.manager.remove_server(name)
         self.assertNotIn(name, self.manager.servers)
 
+    def test_config_saves_are_coalesced(self):
+        """Test that config mutations are written once on flush"""
+        self.manager.add_server("First", os.path.join(self.test_dir, "first.js"))
+        self.manager.add_server("Second", os.path.join(self.test_dir, "second.js"))
+        self.manager.update_server("First", port=3000)
+        
+        # Nothing written yet, the save is still pending
+        self.assertFalse(os.path.exists(self.config_file))
+        
+        self.manager.flush()
+        with open(self.config_file, 'r') as f:
+            saved = json.load(f)
+        self.assertEqual(set(saved.keys()), {"First", "Second"})
+        self.assertEqual(saved["First"]["port"], 3000)
+
+    def test_legacy_config_is_upgraded_on_disk(self):
+        """Test that backward-compatibility fixups are persisted once"""
+        with open(self.config_file, 'w') as f:
+            json.dump({"Legacy": {"path": "legacy.js"}}, f)
+
+        manager = ConfigManager(config_file=self.config_file, settings_file=self.settings_file,
+                                stacks_file=self.stacks_file)
+        manager.flush()
+
+        with open(self.config_file, 'r') as f:
+            saved = json.load(f)
+        self.assertEqual(saved["Legacy"]["server_type"], "nodejs")
+        self.assertEqual(saved["Legacy"]["python_command"], "python")
+
     def test_server_instance_creation(self):
         """Test that ServerManager creates ServerInstance correctly"""
         name = "TestInstance"
@@ -62,35 +97,22 @@ class TestRefactoredServerManager(unittest.TestCase):
             
         self.manager.add_server(name, path)
         
-        # Mock subprocess to avoid actual execution
-        with patch("subprocess.Popen") as mock_popen, \
-             patch("psutil.Process"), \
-             patch("ui.log_reader.LogReaderThread"):
-            
-            mock_process = MagicMock()
-            mock_process.pid = 12345
-            mock_process.poll.return_value = None
-            # Fix: Mock readline to return bytes
-            mock_process.stdout.readline.return_value = b""
-            mock_process.stderr.readline.return_value = b""
-            mock_popen.return_value = mock_process
-            
-            # Start server
-            result = self.manager.start_server(name)
-            self.assertTrue(result)
-            
-            # Verify instance created
-            self.assertIn(name, self.manager.instances)
-            self.assertIsInstance(self.manager.instances[name], ServerInstance)
-            self.assertEqual(self.manager.instances[name].name, name)
-            
-            # Verify status
-            self.assertEqual(self.manager.get_server_status(name), "running")
-            
-            # Stop server
-            self.manager.stop_server(name)
-            self.assertNotIn(name, self.manager.instances)
-            self.assertEqual(self.manager.get_server_status(name), "stopped")
+        # Start server with a stub process to avoid actual execution
+        result = self.manager.start_server(name, popen_factory=PopenStub)
+        self.assertTrue(result)
+        
+        # Verify instance created
+        self.assertIn(name, self.manager.instances)
+        self.assertIsInstance(self.manager.instances[name], ServerInstance)
+        self.assertEqual(self.manager.instances[name].name, name)
+        
+        # Verify status
+        self.assertEqual(self.manager.get_server_status(name), "running")
+        
+        # Stop server
+        self.manager.stop_server(name)
+        self.assertNotIn(name, self.manager.instances)
+        self.assertEqual(self.manager.get_server_status(name), "stopped")
 
     def test_settings_delegation(self):
         """Test that settings methods are delegated correctly"""
@@ -136,16 +158,7 @@ class TestRefactoredServerManager(unittest.TestCase):
             
         self.manager.add_server(name, path)
         
-        with patch("subprocess.Popen") as mock_popen, \
-             patch("psutil.Process") as mock_psutil:
-            
-            mock_process = MagicMock()
-            mock_process.pid = 12345
-            mock_process.poll.return_value = None
-            mock_process.stdout.readline.return_value = b""
-            mock_process.stderr.readline.return_value = b""
-            mock_popen.return_value = mock_process
-            
+        with patch("psutil.Process") as mock_psutil:
             # Mock psutil process for metrics
             mock_psutil_instance = MagicMock()
             mock_psutil_instance.is_running.return_value = True
@@ -153,7 +166,7 @@ class TestRefactoredServerManager(unittest.TestCase):
             mock_psutil_instance.memory_info.return_value.rss = 1024 * 1024 * 50 # 50MB
             mock_psutil.return_value = mock_psutil_instance
             
-            self.manager.start_server(name)
+            self.manager.start_server(name, popen_factory=PopenStub)
             
             # Test record_server_metrics
             self.manager.record_server_metrics(name)
@@ -171,5 +184,65 @@ class TestRefactoredServerManager(unittest.TestCase):
             self.assertIn(name, self.manager.last_metrics)
             self.assertEqual(self.manager.last_metrics[name]["cpu_percent"], 10.0)
 
+    def test_sample_all_metrics(self):
+        """Test one pass reads every running server and records only the requested ones"""
+        for name in ("First", "Second"):
+            path = os.path.join(self.test_dir, f"{name}.js")
+            with open(path, 'w') as f:
+                f.write("console.log('hello')")
+            self.manager.add_server(name, path)
+            self.manager.start_server(name, popen_factory=PopenStub)
+        
+        changed = self.manager.sample_all_metrics(record={"First"})
+        
+        self.assertEqual(set(changed), {"First", "Second"})
+        self.assertEqual(changed["Second"], {"cpu_percent": 0.0, "memory_mb": 0.0})
+        self.assertEqual(len(self.manager.metrics_history["First"]), 1)
+        self.assertNotIn("Second", self.manager.metrics_history)
+
+    def test_metrics_history_reused_until_recorded(self):
+        """Test get_metrics_history returns the same result until a sample is recorded"""
+        name = "HistoryTest"
+        path = os.path.join(self.test_dir, "server.js")
+        with open(path, 'w') as f:
+            f.write("console.log('hello')")
+        self.manager.add_server(name, path)
+        self.manager.start_server(name, popen_factory=PopenStub)
+        
+        first = self.manager.get_metrics_history(time_range_seconds=60)
+        self.assertIs(self.manager.get_metrics_history(time_range_seconds=60), first)
+        
+        self.manager.record_server_metrics(name)
+        second = self.manager.get_metrics_history(time_range_seconds=60)
+        self.assertIsNot(second, first)
+        self.assertEqual(len(second[name]), 1)
+        
+        # Removing the server drops its memoized results
+        self.manager.get_metrics_history(name, time_range_seconds=60)
+        self.manager.remove_server(name)
+        self.assertFalse([key for key in self.manager._history_results if key[0] == name])
+
+    def test_exit_sampled_before_notification(self):
+        """Test a process exit seen by the monitor first is still cleaned up by the manager"""
+        name = "ExitTest"
+        path = os.path.join(self.test_dir, "server.js")
+        with open(path, 'w') as f:
+            f.write("console.log('hello')")
+        self.manager.add_server(name, path)
+        self.manager.start_server(name, popen_factory=PopenStub)
+        process = self.manager.instances[name].process
+        
+        # The process exits; the monitor samples before the queued notification arrives
+        process.kill()
+        self.assertEqual(self.manager.sample_all_metrics(record={name}), {})
+        self.assertIn(name, self.manager.instances)
+        
+        # The pid is free for reuse now, so stopping must not look it up again
+        with patch("psutil.Process") as process_cls:
+            self.manager._on_process_exited(name, process.pid)
+        process_cls.assert_not_called()
+        self.assertNotIn(name, self.manager.instances)
+        self.assertEqual(self.manager.get_server_status(name), "stopped")
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,54 +1,42 @@
 """
 Tests for Server Stacks feature
 """
-import os
+import copy
 import json
 import unittest
-import shutil
+import pytest
 from config_manager import ConfigManager
 from server_manager import ServerManager
 
+SERVERS = {
+    "server1": {"path": "/tmp/s1", "command": "node", "status": "stopped"},
+    "server2": {"path": "/tmp/s2", "command": "node", "status": "stopped"}
+}
+
 class TestServerStacks(unittest.TestCase):
-    def setUp(self):
-        # Create temporary config files
-        self.test_dir = "test_data"
-        if not os.path.exists(self.test_dir):
-            os.makedirs(self.test_dir)
-            
-        self.config_file = os.path.join(self.test_dir, "servers.json")
-        self.settings_file = os.path.join(self.test_dir, "settings.json")
-        self.stacks_file = "stacks.json" # ConfigManager uses relative path for now, we might need to patch it or just use it
+    @pytest.fixture(scope="class", autouse=True)
+    @classmethod
+    def _class_manager(cls, tmp_path_factory):
+        # One manager for the class, the tests only touch its in-memory state
+        test_dir = tmp_path_factory.mktemp("stacks")
+        config_file = test_dir / "servers.json"
+        settings_file = test_dir / "settings.json"
+        config_file.write_text(json.dumps(SERVERS))
+        settings_file.write_text(json.dumps({}))
         
-        # Backup existing stacks.json if it exists
-        if os.path.exists(self.stacks_file):
-            shutil.copy(self.stacks_file, self.stacks_file + ".bak")
-            
-        # Create dummy servers
-        with open(self.config_file, 'w') as f:
-            json.dump({
-                "server1": {"path": "/tmp/s1", "command": "node", "status": "stopped"},
-                "server2": {"path": "/tmp/s2", "command": "node", "status": "stopped"}
-            }, f)
-            
-        with open(self.settings_file, 'w') as f:
-            json.dump({}, f)
-            
-        # Clear stacks.json
-        with open(self.stacks_file, 'w') as f:
-            json.dump({}, f)
-            
-        self.server_manager = ServerManager(self.config_file, self.settings_file)
-        
-    def tearDown(self):
-        # Cleanup
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
-            
-        # Restore stacks.json
-        if os.path.exists(self.stacks_file + ".bak"):
-            shutil.move(self.stacks_file + ".bak", self.stacks_file)
-        elif os.path.exists(self.stacks_file):
-            os.remove(self.stacks_file)
+        cls.server_manager = ServerManager(str(config_file), str(settings_file),
+                                           str(test_dir / "stacks.json"),
+                                           logs_dir=str(test_dir / "logs"),
+                                           metrics_dir=str(test_dir / "metrics"))
+        cls.initial_servers = copy.deepcopy(cls.server_manager.servers)
+        yield
+        cls.server_manager.flush()
+    
+    def setUp(self):
+        # Reset what the previous test changed instead of building a new manager
+        self.server_manager.servers.clear()
+        self.server_manager.servers.update(copy.deepcopy(self.initial_servers))
+        self.server_manager.config_manager.stacks.clear()
             
     def test_add_stack(self):
         """Test adding a stack"""
@@ -97,5 +85,12 @@ class TestServerStacks(unittest.TestCase):
         status = self.server_manager.get_stack_status("test_stack")
         self.assertEqual(status, "running")
 
+    def test_get_all_statuses(self):
+        """Test the status map matches the per-server status"""
+        self.server_manager.servers["server1"]["status"] = "running"
+        
+        statuses = self.server_manager.get_all_statuses()
+        self.assertEqual(statuses, {"server1": "running", "server2": "stopped"})
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,31 +1,62 @@
 """
 Dashboard view showing summary statistics
 """
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QScrollArea, QSizePolicy
+from bisect import bisect_left
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QScrollArea, QSizePolicy
 from PySide6.QtCore import Qt, QTimer
 from server_manager import ServerManager
 from .constants import (
-    SPACING_LARGE, SPACING_MEDIUM, SPACING_NORMAL, SPACING_SMALL, SPACING_MINIMAL
+    SPACING_LARGE, SPACING_MEDIUM, SPACING_NORMAL, SPACING_MINIMAL
 )
 from .styles import (
-    get_dashboard_style, get_card_style, get_success_button_style,
-    get_label_style
+    get_dashboard_style, get_card_style, get_label_style
 )
 from .performance_graph import PerformanceGraphTabWidget
 
+# Stat card stylesheets, built once instead of for every card
+_CARD_STYLE = get_card_style()
+_CARD_TITLE_STYLE = get_label_style("small", "tertiary")
+_CARD_VALUE_STYLES = {color: get_label_style("large", color)
+                      for color in ("primary", "success", "error", "info")}
+
 
 class DashboardView(QWidget):
     """Modern dashboard view showing only summary statistics"""
     
+    # Delay used to merge bursts of server signals into one summary update
+    SUMMARY_DELAY_MS = 200
+    # Fallback graph refresh while the dashboard is shown; graphs normally
+    # update when the server manager records new samples (metrics_recorded)
+    GRAPH_UPDATE_INTERVAL_MS = 5000
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent_window = parent
+        self._last_history = None  # get_metrics_history result the graphs were built from
+        self._last_values = {}  # Stat card key -> text last set on its label
         self.init_ui()
         
-        # Timer to update graphs
+        # Single-shot timer for coalesced summary updates
+        self._summary_timer = QTimer(self)
+        self._summary_timer.setSingleShot(True)
+        self._summary_timer.setInterval(self.SUMMARY_DELAY_MS)
+        self._summary_timer.timeout.connect(self._update_pending_summary)
+        
+        # Timer to update graphs, running only while the dashboard is shown
         self.graph_update_timer = QTimer()
+        self.graph_update_timer.setInterval(self.GRAPH_UPDATE_INTERVAL_MS)
         self.graph_update_timer.timeout.connect(self.update_graphs)
-        self.graph_update_timer.start(1000)  # Update every second
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Catch up on what changed while hidden, then resume the refresh
+        self.update_graphs()
+        self.graph_update_timer.start()
+    
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        # Hidden behind another view, or the window went to the tray / was minimized
+        self.graph_update_timer.stop()
     
     def init_ui(self):
         """Initialize dashboard UI"""
@@ -101,18 +132,19 @@ class DashboardView(QWidget):
                          color: str = "primary") -> QLabel:
         """Create a stat card widget and add it to the layout"""
         card = QWidget()
-        card.setStyleSheet(get_card_style())
+        card.setStyleSheet(_CARD_STYLE)
         card_layout = QVBoxLayout()
         card_layout.setContentsMargins(0, 0, 0, 0)
         card_layout.setSpacing(SPACING_MINIMAL)
         card.setLayout(card_layout)
         
         title_label = QLabel(title)
-        title_label.setStyleSheet(get_label_style("small", "tertiary"))
+        title_label.setStyleSheet(_CARD_TITLE_STYLE)
         card_layout.addWidget(title_label)
         
         value_label = QLabel(value)
-        value_label.setStyleSheet(get_label_style("large", color))
+        value_style = _CARD_VALUE_STYLES.get(color)
+        value_label.setStyleSheet(value_style if value_style is not None else get_label_style("large", color))
         card_layout.addWidget(value_label)
         
         parent_layout.addWidget(card)
@@ -122,114 +154,101 @@ class DashboardView(QWidget):
         """Get the name of the selected server - not applicable for dashboard"""
         return None
     
-    def update_table(self, server_manager: ServerManager):
-        """Update the summary statistics"""
-        servers = server_manager.get_all_servers()
-        
-        running_count = 0
-        stopped_count = 0
-        total_cpu = 0.0
-        total_ram = 0.0
-        
-        for name, config in servers.items():
-            status = server_manager.get_server_status(name)
-            
-            if status == "running":
-                running_count += 1
-                # Get metrics if available
-                if name in server_manager.psutil_processes:
-                    if name in server_manager.last_metrics:
-                        metrics = server_manager.last_metrics[name]
-                        total_cpu += metrics.get("cpu_percent", 0)
-                        total_ram += metrics.get("memory_mb", 0)
-                    else:
-                        metrics = server_manager.get_server_metrics(name)
-                        if metrics:
-                            total_cpu += metrics.get("cpu_percent", 0)
-                            total_ram += metrics.get("memory_mb", 0)
-            else:
-                stopped_count += 1
-        
-        # Update summary stats
-        self.total_label.setText(str(len(servers)))
-        self.running_label.setText(str(running_count))
-        self.stopped_label.setText(str(stopped_count))
-        
-        if running_count > 0:
-            self.cpu_label.setText(f"{total_cpu:.1f}%")
-            self.ram_label.setText(f"{total_ram:.1f} MB")
-        else:
-            self.cpu_label.setText("--")
-            self.ram_label.setText("-- MB")
-    
     def update_summary_stats(self, server_manager: ServerManager):
         """Update only the summary statistics"""
+        # This update covers any pending coalesced one
+        self._summary_timer.stop()
         servers = server_manager.get_all_servers()
+        statuses = server_manager.get_all_statuses()
+        # last_metrics is rebuilt on every access, so read it once per pass
+        psutil_processes = server_manager.psutil_processes
+        last_metrics = server_manager.last_metrics
         running_count = 0
         total_cpu = 0.0
         total_ram = 0.0
         
         for name in servers.keys():
-            status = server_manager.get_server_status(name)
+            status = statuses.get(name, "stopped")
             if status == "running":
                 running_count += 1
-                if name in server_manager.psutil_processes:
-                    # Get cached metrics or calculate directly
-                    if name in server_manager.last_metrics:
-                        metrics = server_manager.last_metrics[name]
-                        total_cpu += metrics.get("cpu_percent", 0)
-                        total_ram += metrics.get("memory_mb", 0)
-                    else:
-                        # Try to get metrics (may return None if no change)
-                        metrics = server_manager.get_server_metrics(name)
-                        if metrics:
-                            total_cpu += metrics.get("cpu_percent", 0)
-                            total_ram += metrics.get("memory_mb", 0)
+                # MetricsMonitor samples every server in one pass; a server it hasn't
+                # reached yet counts as idle until its server_metrics_changed arrives
+                if name in psutil_processes and name in last_metrics:
+                    metrics = last_metrics[name]
+                    total_cpu += metrics.get("cpu_percent", 0)
+                    total_ram += metrics.get("memory_mb", 0)
         
         stopped_count = len(servers) - running_count
         
-        self.total_label.setText(str(len(servers)))
-        self.running_label.setText(str(running_count))
-        self.stopped_label.setText(str(stopped_count))
+        self._set_stat("total", self.total_label, str(len(servers)))
+        self._set_stat("running", self.running_label, str(running_count))
+        self._set_stat("stopped", self.stopped_label, str(stopped_count))
         
         if running_count > 0:
-            self.cpu_label.setText(f"{total_cpu:.1f}%")
-            self.ram_label.setText(f"{total_ram:.1f} MB")
+            self._set_stat("cpu", self.cpu_label, f"{total_cpu:.1f}%")
+            self._set_stat("ram", self.ram_label, f"{total_ram:.1f} MB")
         else:
-            self.cpu_label.setText("--")
-            self.ram_label.setText("-- MB")
+            self._set_stat("cpu", self.cpu_label, "--")
+            self._set_stat("ram", self.ram_label, "-- MB")
+    
+    def _set_stat(self, key: str, label: QLabel, text: str):
+        """Set a stat card's text, skipping the call into Qt when it is unchanged"""
+        if self._last_values.get(key) != text:
+            label.setText(text)
+            self._last_values[key] = text
+    
+    def schedule_summary_update(self):
+        """Update the summary stats once the current burst of server signals settles"""
+        # Don't restart a pending timer, a steady signal stream would postpone it forever
+        if not self._summary_timer.isActive():
+            self._summary_timer.start()
+    
+    def _update_pending_summary(self):
+        if self.parent_window and hasattr(self.parent_window, 'server_manager'):
+            self.update_summary_stats(self.parent_window.server_manager)
     
     def on_server_status_changed(self, name: str, status: str):
         """Handle server status change - update summary stats"""
-        self.update_summary_stats(self.parent_window.server_manager)
+        self.schedule_summary_update()
     
     def on_server_metrics_changed(self, name: str, metrics: dict):
         """Handle server metrics change - update summary stats"""
-        self.update_summary_stats(self.parent_window.server_manager)
+        self.schedule_summary_update()
     
     def on_server_stopped(self, name: str):
         """Handle server stopped - update summary stats"""
-        self.update_summary_stats(self.parent_window.server_manager)
+        self.schedule_summary_update()
     
     def update_graphs(self):
         """Update performance graphs with aggregated data from all servers"""
         if not self.parent_window or not hasattr(self.parent_window, 'server_manager'):
             return
+        if not self.isVisible():
+            return
         
         server_manager = self.parent_window.server_manager
         # Get selected time range from the graph widget
         time_range_seconds = self.performance_graphs.get_time_range_seconds()
         history = server_manager.get_metrics_history(time_range_seconds=time_range_seconds)
+        if history is self._last_history:
+            # No new samples: only let the graphs scroll with the clock
+            self.performance_graphs.cpu_graph.update()
+            self.performance_graphs.ram_graph.update()
+            return
+        self._last_history = history
         
         # Aggregate data from all servers
         cpu_data_points = []
         ram_data_points = []
         
+        # Histories are time-ordered; keep their timestamps as separate columns for bisect
+        series = [([point[0] for point in server_history], server_history)
+                  for server_history in history.values() if server_history]
+        
         # Collect all timestamps from all servers
         all_timestamps = set()
-        for server_name, server_history in history.items():
-            for ts, cpu, ram in server_history:
-                all_timestamps.add(ts)
+        for timestamps, _ in series:
+            all_timestamps.update(timestamps)
         
         if not all_timestamps:
             # No data, clear graphs
@@ -240,20 +259,26 @@ class DashboardView(QWidget):
         # Sort timestamps
         sorted_timestamps = sorted(all_timestamps)
         
+        # Timestamps are visited in increasing order, so each server's search
+        # resumes where the previous one ended
+        positions = [0] * len(series)
+        
         # For each timestamp, aggregate CPU and RAM from all running servers
         for timestamp in sorted_timestamps:
             total_cpu = 0.0
             total_ram = 0.0
             count = 0
             
-            for server_name, server_history in history.items():
-                # Find the closest data point for this timestamp (within 1 second)
-                for ts, cpu, ram in server_history:
-                    if abs(ts - timestamp) <= 1.0:
-                        total_cpu += cpu
-                        total_ram += ram
-                        count += 1
-                        break
+            for index, (timestamps, server_history) in enumerate(series):
+                # The closest data point for this timestamp (within 1 second) is the
+                # first one at or after timestamp - 1
+                position = bisect_left(timestamps, timestamp - 1.0, positions[index])
+                positions[index] = position
+                if position < len(timestamps) and timestamps[position] <= timestamp + 1.0:
+                    _, cpu, ram = server_history[position]
+                    total_cpu += cpu
+                    total_ram += ram
+                    count += 1
             
             if count > 0:
                 cpu_data_points.append((timestamp, total_cpu))
@@ -1,13 +1,26 @@
 """
 Background thread that reads server process logs
+
+On Unix a single shared thread multiplexes the pipes of every server process
+with a selector. Windows can't select() on pipes, so each process gets its own
+LogReaderThread there.
 """
-from PySide6.QtCore import QThread, QObject, Signal
+from PySide6.QtCore import QThread, QObject
+import os
+import queue
+import selectors
 import subprocess
 import sys
+import threading
+
+# Bytes read from a pipe per readiness event
+_READ_SIZE = 64 * 1024
+# Seconds to wait for the multiplexer thread to drop a process's pipes
+_UNREGISTER_TIMEOUT = 2.0
 
 
 class LogReaderThread(QThread):
-    """Background thread that reads from process stdout/stderr and emits log signals"""
+    """Background thread that reads one process's stdout/stderr and emits log signals (Windows)"""
     
     def __init__(self, server_name: str, process: subprocess.Popen, server_manager: QObject):
         super().__init__()
@@ -19,13 +32,8 @@ class LogReaderThread(QThread):
     def run(self):
         """Main log reading loop"""
         self.running = True
-        
-        # Use select for non-blocking reads (works on Unix)
-        # On Windows, we'll use a different approach
-        if sys.platform == 'win32':
-            self._read_windows()
-        else:
-            self._read_unix()
+        # Only used on Windows; Unix pipes go through the shared _LogMultiplexer
+        self._read_windows()
     
     def _read_windows(self):
         """Read logs on Windows (using threading for non-blocking reads)"""
@@ -124,38 +132,142 @@ class LogReaderThread(QThread):
                 if log_line:
                     self.server_manager.server_log.emit(self.server_name, log_line, True)
     
-    def _read_unix(self):
-        """Read logs on Unix/Linux/Mac (using select)"""
-        import select
-        import time
-        
-        while self.running and self.process.poll() is None:
-            try:
-                # Use select to check if data is available
-                if self.process.stdout and self.process.stderr:
-                    ready, _, _ = select.select(
-                        [self.process.stdout, self.process.stderr],
-                        [],
-                        [],
-                        0.1  # timeout
-                    )
-                    
-                    for stream in ready:
-                        line = stream.readline()
-                        if line:
-                            log_line = line.decode('utf-8', errors='replace').rstrip()
-                            if log_line:
-                                # Check if it's stderr (error) or stdout (normal)
-                                is_error = (stream == self.process.stderr)
-                                self.server_manager.server_log.emit(self.server_name, log_line, is_error)
-                else:
-                    time.sleep(0.1)
-            except Exception as e:
-                if self.running:
-                    break
-    
     def stop(self):
         """Stop the log reading thread"""
         self.running = False
         self.wait()  # Wait for thread to finish
 
+
+
+class _LogMultiplexer:
+    """One daemon thread that reads the stdout/stderr pipes of all registered processes"""
+    
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        # Registration changes are applied by the pump thread itself, which is
+        # woken through this pipe; selectors aren't safe to modify concurrently
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._wake_r, self._wake_w = os.pipe()
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, name="LogMultiplexer", daemon=True)
+        self._thread.start()
+    
+    def register(self, reader: "MultiplexedLogReader"):
+        self._request(("register", reader, None))
+    
+    def unregister(self, reader: "MultiplexedLogReader"):
+        """Stop reading and close a process's pipes; returns once no more lines will be emitted"""
+        done = threading.Event()
+        self._request(("unregister", reader, done))
+        if not done.wait(_UNREGISTER_TIMEOUT):
+            # The pump thread is gone or stuck; don't hang the caller (the GUI thread)
+            self._detach(reader)
+    
+    def _request(self, request):
+        self._requests.put(request)
+        os.write(self._wake_w, b"\0")
+    
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select():
+                if key.fd == self._wake_r:
+                    os.read(self._wake_r, _READ_SIZE)
+                    self._apply_requests()
+                else:
+                    self._read(key)
+    
+    def _apply_requests(self):
+        while True:
+            try:
+                action, reader, done = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            if action == "register":
+                process = reader.process
+                for stream, is_error in ((process.stdout, False), (process.stderr, True)):
+                    if stream is None:
+                        continue
+                    try:
+                        # (reader, is_error, buffered partial line)
+                        self._selector.register(stream.fileno(), selectors.EVENT_READ,
+                                                [reader, is_error, b""])
+                    except (KeyError, ValueError, OSError):
+                        pass  # The pipe is already closed
+            else:
+                self._detach(reader)
+            if done is not None:
+                done.set()
+    
+    def _detach(self, reader: "MultiplexedLogReader"):
+        """Stop watching a process's pipes and close them"""
+        process = reader.process
+        for stream in (process.stdout, process.stderr):
+            if stream is None:
+                continue
+            try:
+                self._selector.unregister(stream.fileno())
+            except (KeyError, ValueError, OSError):
+                pass  # Already at EOF (or the pipe is closed)
+            try:
+                stream.close()
+            except OSError:
+                pass
+    
+    def _read(self, key: selectors.SelectorKey):
+        state = key.data
+        reader, is_error, pending = state
+        try:
+            data = os.read(key.fd, _READ_SIZE)
+        except OSError:
+            data = b""
+        
+        if not data:
+            # EOF: flush a last unterminated line and stop watching the pipe
+            self._selector.unregister(key.fd)
+            reader.emit_line(pending, is_error)
+            return
+        
+        *lines, state[2] = (pending + data).split(b"\n")
+        for line in lines:
+            reader.emit_line(line, is_error)
+
+
+_multiplexer: "_LogMultiplexer | None" = None
+_multiplexer_lock = threading.Lock()
+
+
+def _get_multiplexer() -> _LogMultiplexer:
+    """Get the shared multiplexer, starting its thread on first use"""
+    global _multiplexer
+    with _multiplexer_lock:
+        if _multiplexer is None:
+            _multiplexer = _LogMultiplexer()
+        return _multiplexer
+
+
+class MultiplexedLogReader:
+    """Per-process handle on the shared multiplexer, with the start/stop API of LogReaderThread"""
+    
+    def __init__(self, server_name: str, process: subprocess.Popen, server_manager: QObject):
+        self.server_name = server_name
+        self.process = process
+        self.server_manager = server_manager
+    
+    def emit_line(self, line: bytes, is_error: bool):
+        """Decode and emit one raw output line (called on the multiplexer thread)"""
+        log_line = line.decode('utf-8', errors='replace').rstrip()
+        if log_line:
+            self.server_manager.server_log.emit(self.server_name, log_line, is_error)
+    
+    def start(self):
+        _get_multiplexer().register(self)
+    
+    def stop(self):
+        _get_multiplexer().unregister(self)
+
+
+def create_log_reader(server_name: str, process: subprocess.Popen, server_manager: QObject):
+    """Create the log reader for a process; call start() on it to begin reading"""
+    if sys.platform == 'win32':
+        return LogReaderThread(server_name, process, server_manager)
+    return MultiplexedLogReader(server_name, process, server_manager)
@@ -1,8 +1,9 @@
 """
 Background thread that monitors server metrics
 """
-from PySide6.QtCore import QThread
+from PySide6.QtCore import Qt, QThread
 from server_manager import ServerManager
+import threading
 import time
 
 
@@ -13,6 +14,13 @@ class MetricsMonitor(QThread):
         super().__init__()
         self.server_manager = server_manager
         self.running = False
+        # Set when there may be new work (a server started) or on stop()
+        self._wake = threading.Event()
+        server_manager.server_started.connect(self.wake, Qt.DirectConnection)
+    
+    def wake(self):
+        """Resume monitoring if the thread is idle (safe to call from any thread)"""
+        self._wake.set()
     
     def run(self):
         """Main monitoring loop"""
@@ -23,22 +31,26 @@ class MetricsMonitor(QThread):
         while self.running:
             current_time = time.time()
             
-            # Iterate through all psutil processes
-            for name in list(self.server_manager.psutil_processes.keys()):
+            names = list(self.server_manager.psutil_processes.keys())
+            if not names:
+                # Nothing is running: sleep until a server starts instead of polling
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            
+            # One reading per server feeds both the UI (server_manager emits
+            # server_metrics_changed itself when they changed) and, every
+            # second, the history used by the graphs
+            due = {name for name in names
+                   if current_time - last_record_time.get(name, float("-inf")) >= 1.0}
+            self.server_manager.sample_all_metrics(record=due)
+            for name in due:
+                last_record_time[name] = current_time
+            
+            for name in names:
                 if not self.running:
                     break
                 
-                # Record metrics to history every second (for graphs)
-                if name not in last_record_time or (current_time - last_record_time[name]) >= 1.0:
-                    self.server_manager.record_server_metrics(name)
-                    last_record_time[name] = current_time
-                
-                # Get metrics (only returns if changed) - for UI updates
-                metrics = self.server_manager.get_server_metrics(name)
-                if metrics:
-                    # Emit signal via server_manager
-                    self.server_manager.server_metrics_changed.emit(name, metrics)
-                
                 # Check for port detection every 2 seconds (less frequent than metrics)
                 if name not in last_port_check_time or (current_time - last_port_check_time[name]) >= 2.0:
                     self.server_manager.detect_port(name)
@@ -50,5 +62,6 @@ class MetricsMonitor(QThread):
     def stop(self):
         """Stop the monitoring thread"""
         self.running = False
+        self._wake.set()
         self.wait()  # Wait for thread to finish
 
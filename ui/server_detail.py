@@ -9,6 +9,7 @@ from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont, QTextCharFormat, QColor
 from datetime import datetime, timezone, timedelta
 import re
+import time
 import webbrowser
 from typing import Dict, Optional
 from .constants import SPACING_MEDIUM, SPACING_NORMAL, SPACING_SMALL
@@ -26,14 +27,28 @@ class ServerDetailView(QWidget):
         super().__init__(parent)
         self.server_name = server_name
         self.parent_window = parent
+        # Monotonic time the view was last shown or hidden (used to drop idle views)
+        self.last_visible = time.monotonic()
         self.init_ui()
         # Load persistent logs after UI is initialized
         self.load_persistent_logs()
         
-        # Timer to update graphs
+        # Timer to update graphs every second, running only while the view is shown
         self.graph_update_timer = QTimer()
+        self.graph_update_timer.setInterval(1000)
         self.graph_update_timer.timeout.connect(self.update_graphs)
-        self.graph_update_timer.start(1000)  # Update every second
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.last_visible = time.monotonic()
+        # Catch up on what changed while hidden, then resume the refresh
+        self.update_graphs()
+        self.graph_update_timer.start()
+    
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.last_visible = time.monotonic()
+        self.graph_update_timer.stop()
     
     def init_ui(self):
         """Initialize server detail UI"""
@@ -315,6 +330,23 @@ class ServerDetailView(QWidget):
     
     def append_log(self, text: str, is_error: bool = False):
         """Append text to logs area with color coding and timestamp"""
+        self.append_logs([(text, is_error)])
+    
+    def append_logs(self, lines: list):
+        """Append a batch of (text, is_error) lines in one edit and scroll once"""
+        cursor = self.logs_text.textCursor()
+        cursor.movePosition(cursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for text, is_error in lines:
+            self._insert_log_line(cursor, text, is_error)
+        cursor.endEditBlock()
+        
+        # Auto-scroll to bottom
+        scrollbar = self.logs_text.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+    
+    def _insert_log_line(self, cursor, text: str, is_error: bool):
+        """Insert one log line at the cursor with color coding and timestamp"""
         # Parse timestamp and message
         timestamp, message = self._parse_log_line(text)
         
@@ -331,10 +363,6 @@ class ServerDetailView(QWidget):
         else:
             message_format = self.normal_format
         
-        # Move cursor to end and insert text with formatting
-        cursor = self.logs_text.textCursor()
-        cursor.movePosition(cursor.MoveOperation.End)
-        
         if self.show_timestamps:
             # Add timestamp if not present
             if not timestamp:
@@ -353,10 +381,6 @@ class ServerDetailView(QWidget):
             cursor.insertText(message)
         
         cursor.insertText('\n')
-        
-        # Auto-scroll to bottom
-        scrollbar = self.logs_text.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
     
     def clear_logs(self):
         """Clear the logs area and persistent storage"""
@@ -444,6 +468,8 @@ class ServerDetailView(QWidget):
         """Update performance graphs with data for this server"""
         if not self.parent_window or not hasattr(self.parent_window, 'server_manager'):
             return
+        if not self.isVisible():
+            return
         
         server_manager = self.parent_window.server_manager
         # Get selected time range from the graph widget
@@ -3,7 +3,7 @@ Dialog for application settings
 """
 from PySide6.QtWidgets import (
     QDialog, QFormLayout, QLineEdit, QDialogButtonBox, QLabel,
-    QVBoxLayout, QWidget, QMessageBox
+    QVBoxLayout, QMessageBox
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QKeyEvent
@@ -343,24 +343,6 @@ class SidebarWidget(QWidget):
         # Show menu at cursor position
         menu.exec(button.mapToGlobal(position))
     
-    def select_item(self, name: str):
-        """Select an item and emit signal"""
-        # Uncheck previous selection
-        if self.selected_item == "dashboard":
-            self.dashboard_btn.setChecked(False)
-        elif self.selected_item in self.server_buttons:
-            self.server_buttons[self.selected_item].setChecked(False)
-        
-        # Check new selection
-        self.selected_item = name
-        if name == "dashboard":
-            self.dashboard_btn.setChecked(True)
-        elif name in self.server_buttons:
-            self.server_buttons[name].setChecked(True)
-        
-        # Emit signal
-        self.item_selected.emit(name)
-    
     def on_add_server_clicked(self):
         """Handle Add Server button click"""
         self.add_server_requested.emit()
@@ -3,14 +3,12 @@ Stack Detail View - Shows details and controls for a server stack
 """
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-    QPushButton, QScrollArea, QFrame, QGridLayout
+    QPushButton, QScrollArea, QFrame
 )
-from PySide6.QtCore import Qt, Signal
 from .styles import (
-    get_card_style, get_label_style, get_primary_button_style,
-    get_danger_button_style, get_success_button_style
+    get_card_style, get_label_style, get_danger_button_style, get_success_button_style
 )
-from .constants import SPACING_LARGE, SPACING_MEDIUM, SPACING_NORMAL
+from .constants import SPACING_LARGE, SPACING_NORMAL
 
 class StackDetailView(QWidget):
     """View showing details of a specific server stack"""
@@ -19,8 +17,16 @@ class StackDetailView(QWidget):
         super().__init__(parent)
         self.stack_name = stack_name
         self.parent_window = parent
+        self._member_servers: set = set()  # Servers in this stack, filled by update_stack_info
         self.init_ui()
         
+        # Subscribe to server events directly; only members of this stack trigger an update
+        if self.parent_window and hasattr(self.parent_window, 'server_manager'):
+            server_manager = self.parent_window.server_manager
+            server_manager.server_status_changed.connect(self._on_server_status_changed)
+            server_manager.server_started.connect(self._on_server_event)
+            server_manager.server_stopped.connect(self._on_server_event)
+        
     def init_ui(self):
         """Initialize the UI"""
         # Main layout
@@ -101,6 +107,7 @@ class StackDetailView(QWidget):
             return
             
         server_names = stacks[self.stack_name]
+        self._member_servers = set(server_names)
         
         # Update Status
         status = server_manager.get_stack_status(self.stack_name)
@@ -176,3 +183,11 @@ class StackDetailView(QWidget):
     def update_status(self):
         """Update status display (called by signals)"""
         self.update_stack_info()
+    
+    def _on_server_status_changed(self, name: str, status: str):
+        if name in self._member_servers:
+            self.update_status()
+    
+    def _on_server_event(self, name: str):
+        if name in self._member_servers:
+            self.update_status()
@@ -6,7 +6,6 @@ from PySide6.QtWidgets import (
     QLineEdit, QPushButton, QListWidget, QListWidgetItem,
     QCheckBox, QMessageBox
 )
-from PySide6.QtCore import Qt
 from .styles import get_dialog_style, get_input_style, get_primary_button_style
 
 class StackDialog(QDialog):